@@ -0,0 +1,215 @@
+# benchmarks || bench_inventory.py
+"""
+Inventory benchmarks against the local fake Jinn API.
+
+Each case runs in a fresh interpreter, so peak RSS and import state are not
+shared between cases, and reports wall time, peak RSS and the number of API
+requests it made::
+
+    python -m benchmarks.bench_inventory --servers 100,10000,100000 --latency 0.02
+    python -m benchmarks.bench_inventory --json results.json
+
+Compare the JSON output of two revisions to spot regressions.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from benchmarks.fake_jinn import FakeJinn
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _peak_rss_kib() -> int:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _fetch_servers() -> int:
+    from infraninja.inventory.jinn import fetch_servers
+
+    hosts, _ = fetch_servers(
+        os.environ["JINN_ACCESS_KEY"],
+        os.environ["JINN_API_URL"],
+        interactive=False,
+    )
+    return len(hosts)
+
+
+def _fetch_servers_selector() -> int:
+    from infraninja.inventory.jinn import fetch_servers
+
+    hosts, _ = fetch_servers(
+        os.environ["JINN_ACCESS_KEY"],
+        os.environ["JINN_API_URL"],
+        interactive=False,
+        selector="group:web & (tag:prod | tag:canary)",
+    )
+    return len(hosts)
+
+
+def _fetch_ssh_config() -> int:
+    from infraninja.inventory.jinn import fetch_ssh_config
+
+    return len(
+        fetch_ssh_config(os.environ["JINN_ACCESS_KEY"], os.environ["JINN_API_URL"])
+    )
+
+
+def _fetch_ssh_keys() -> int:
+    from infraninja.utils.pubkeys import SSHKeyManager
+
+    return len(SSHKeyManager.get_instance().fetch_ssh_keys() or [])
+
+
+# Benchmark name -> function run in the worker, returning a result size
+CASES: Dict[str, Callable[[], int]] = {
+    "fetch_servers": _fetch_servers,
+    "fetch_servers[selector]": _fetch_servers_selector,
+    "fetch_ssh_config": _fetch_ssh_config,
+    "SSHKeyManager.fetch_ssh_keys": _fetch_ssh_keys,
+}
+
+
+def run_worker(case: str) -> None:
+    """Run one case in this process and print its measurements as JSON."""
+    function = CASES[case]
+    # Import outside the timed section; imports are not what we measure here
+    if case.startswith("SSHKeyManager"):
+        import infraninja.utils.pubkeys  # noqa: F401
+    else:
+        import infraninja.inventory.jinn  # noqa: F401
+
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    print(
+        json.dumps(
+            {"seconds": seconds, "peak_rss_kib": _peak_rss_kib(), "result": result}
+        )
+    )
+
+
+def run_case(api: FakeJinn, case: str, cache_dir: str) -> Dict[str, Any]:
+    env = dict(
+        os.environ,
+        JINN_API_URL=api.url,
+        JINN_ACCESS_KEY=api.api_key,
+        JINN_USERNAME=api.credentials["username"],
+        JINN_PASSWORD=api.credentials["password"],
+        JINN_CACHE_DIR=cache_dir,
+        HOME=cache_dir,  # keep ~/.ssh and friends out of the real home
+        PYTHONPATH=os.pathsep.join(
+            filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])
+        ),
+    )
+    api.snapshot_stats(reset=True)
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_inventory", "--worker", case],
+        env=env,
+        cwd=REPO_ROOT,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{case} failed:\n{completed.stderr}")
+    measurement = json.loads(completed.stdout.strip().splitlines()[-1])
+    measurement["requests"] = sum(api.snapshot_stats(reset=True).values())
+    return measurement
+
+
+def run_suite(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+    for servers in args.servers:
+        with FakeJinn(
+            servers=servers,
+            keys=args.keys,
+            page_size=args.page_size,
+            latency=args.latency,
+        ) as api:
+            for case in args.cases:
+                for cache in ("cold", "warm") if args.warm else ("cold",):
+                    runs = []
+                    for _ in range(args.repeat):
+                        with tempfile.TemporaryDirectory(
+                            prefix="infraninja-bench-"
+                        ) as tmp:
+                            if cache == "warm":
+                                run_case(api, case, tmp)  # populate the cache
+                            runs.append(run_case(api, case, tmp))
+                    row = {
+                        "case": case,
+                        "cache": cache,
+                        "servers": servers,
+                        "latency": args.latency,
+                        "seconds": statistics.median(r["seconds"] for r in runs),
+                        "peak_rss_kib": max(r["peak_rss_kib"] for r in runs),
+                        "requests": max(r["requests"] for r in runs),
+                        "result": runs[-1]["result"],
+                    }
+                    results.append(row)
+                    print(
+                        f"{case:<30} {cache:<5} {servers:>7} servers "
+                        f"{row['seconds'] * 1000:>9.1f} ms "
+                        f"{row['peak_rss_kib'] / 1024:>7.1f} MiB "
+                        f"{row['requests']:>4} requests",
+                        flush=True,
+                    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Jinn inventory.")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--servers",
+        type=lambda value: [int(n) for n in value.split(",")],
+        default=[100, 1000, 10000],
+        help="Comma-separated fleet sizes (default: 100,1000,10000)",
+    )
+    parser.add_argument(
+        "--cases",
+        type=lambda value: value.split(","),
+        default=list(CASES),
+        help=f"Comma-separated cases (default: {','.join(CASES)})",
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--keys", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--warm",
+        action="store_true",
+        help="Also measure runs with a populated response cache",
+    )
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    if args.worker:
+        return run_worker(args.worker)
+
+    unknown = set(args.cases) - set(CASES)
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(sorted(unknown))}")
+
+    results = run_suite(args)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
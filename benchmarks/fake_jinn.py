@@ -0,0 +1,321 @@
+# benchmarks || fake_jinn.py
+"""
+Local stand-in for the Jinn API, for benchmarks and offline development.
+
+Serves a synthetic fleet on the endpoints infraninja uses:
+
+- ``GET /inventory/servers/`` (paginated, ``Authentication`` header)
+- ``GET /ssh-tools/ssh-config/`` (``?bastionless=true|false``)
+- ``POST /login/`` returning a ``session_key``
+- ``GET /ssh-tools/ssh-keylist/`` (``Authorization: Bearer <session_key>``)
+
+GET responses carry an ETag and honour ``If-None-Match``. ``GET /__stats__/``
+returns request counts per path (``?reset=1`` clears them).
+
+Run it standalone with::
+
+    python -m benchmarks.fake_jinn --servers 10000 --latency 0.05
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+GROUP_NAMES = ["web", "api", "db", "cache", "queue", "worker", "lb", "monitoring"]
+TAG_NAMES = ["prod", "staging", "canary", "drain", "eu", "us", "gpu", "ssd", "legacy"]
+OS_NAMES = ["ubuntu", "debian", "alpine"]
+KEY_TYPES = ["ssh-ed25519", "ssh-rsa", "ecdsa-sha2-nistp256"]
+
+
+def make_servers(
+    count: int, project: str = "ninja", groups: int = 8, seed: int = 0
+) -> List[Dict[str, Any]]:
+    """Synthesize ``count`` servers spread over ``groups`` groups."""
+    rng = random.Random(seed)
+    group_names = [
+        GROUP_NAMES[i % len(GROUP_NAMES)]
+        + (f"-{i // len(GROUP_NAMES)}" if i >= len(GROUP_NAMES) else "")
+        for i in range(groups)
+    ]
+    servers = []
+    for i in range(count):
+        group = group_names[i % len(group_names)]
+        servers.append(
+            {
+                "id": i + 1,
+                "hostname": f"{group}-{i:06d}.{project}.internal",
+                "ssh_hostname": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+                "ssh_user": rng.choice(["root", "ubuntu", "admin"]),
+                "is_active": rng.random() > 0.05,
+                "tags": sorted(rng.sample(TAG_NAMES, rng.randint(0, 3))),
+                "attributes": {
+                    "os": rng.choice(OS_NAMES),
+                    "rack": f"r{rng.randint(1, 40):02d}",
+                    "cpus": rng.choice([2, 4, 8, 16]),
+                },
+                "group": {"name_en": group, "project": {"name_en": project}},
+            }
+        )
+    return servers
+
+
+def make_ssh_config(servers: List[Dict[str, Any]], bastionless: bool) -> str:
+    """Render an SSH config for the fleet, optionally through a bastion."""
+    blocks = []
+    if not bastionless:
+        blocks.append("Host bastion\n    HostName 192.0.2.1\n    User jump\n")
+    for server in servers:
+        block = (
+            f"Host {server['hostname']}\n"
+            f"    HostName {server['ssh_hostname']}\n"
+            f"    User {server['ssh_user']}\n"
+        )
+        if not bastionless:
+            block += "    ProxyJump bastion\n"
+        blocks.append(block)
+    return "\n".join(blocks)
+
+
+def make_keys(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Synthesize ``count`` public keys in the key-list format."""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i + 1,
+            "key": f"{rng.choice(KEY_TYPES)} AAAA{rng.getrandbits(256):064x} user{i}@ninja",
+        }
+        for i in range(count)
+    ]
+
+
+class FakeJinn:
+    """Synthetic Jinn API state and an HTTP server around it."""
+
+    def __init__(
+        self,
+        servers: int = 1000,
+        groups: int = 8,
+        keys: int = 20,
+        page_size: int = 500,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        api_key: str = "bench-access-key",
+        username: str = "bench",
+        password: str = "bench",
+        seed: int = 0,
+    ) -> None:
+        self.servers = make_servers(servers, groups=groups, seed=seed)
+        self.keys = make_keys(keys, seed=seed)
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.api_key = api_key
+        self.credentials = {"username": username, "password": password}
+        self.sessions: set = set()
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        if self._httpd is None:
+            raise RuntimeError("Server is not running")
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, path: str) -> None:
+        with self._lock:
+            self.stats[path] += 1
+
+    def snapshot_stats(self, reset: bool = False) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+            if reset:
+                self.stats.clear()
+        return stats
+
+    def delay(self) -> None:
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+
+    def inventory_page(self, page: int) -> Dict[str, Any]:
+        start = (page - 1) * self.page_size
+        end = start + self.page_size
+        return {
+            "count": len(self.servers),
+            "next": (
+                f"/inventory/servers/?page={page + 1}"
+                if end < len(self.servers)
+                else None
+            ),
+            "result": self.servers[start:end],
+        }
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> "FakeJinn":
+        """Serve in a background thread; ``port=0`` picks a free port."""
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def serve_forever(self, host: str = "127.0.0.1", port: int = 8765) -> None:
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "FakeJinn":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def _make_handler(api: FakeJinn) -> type:
+    # Pre-rendered bodies, so the server side stays cheap at 100k hosts
+    rendered: Dict[Tuple[str, str], bytes] = {}
+
+    def render(key: Tuple[str, str], build) -> bytes:
+        body = rendered.get(key)
+        if body is None:
+            body = rendered[key] = build()
+        return body
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _send(
+            self, status: int, body: bytes = b"", content_type: str = "application/json"
+        ) -> None:
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            if status == 200 and self.command == "GET":
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+            self.send_response(status)
+            if status == 200:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, status: int, data: Any) -> None:
+            self._send(status, json.dumps(data).encode())
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/__stats__/":
+                return self._json(200, api.snapshot_stats(reset="reset" in query))
+
+            api.count(url.path)
+            api.delay()
+            if url.path == "/inventory/servers/":
+                if self.headers.get("Authentication") != api.api_key:
+                    return self._json(401, {"detail": "Invalid access key"})
+                page = int(query.get("page", ["1"])[0])
+                body = render(
+                    ("inventory", str(page)),
+                    lambda: json.dumps(api.inventory_page(page)).encode(),
+                )
+                return self._send(200, body)
+            if url.path == "/ssh-tools/ssh-config/":
+                if self.headers.get("Authentication") != api.api_key:
+                    return self._json(401, {"detail": "Invalid access key"})
+                bastionless = query.get("bastionless", ["true"])[0].lower() == "true"
+                body = render(
+                    ("ssh-config", str(bastionless)),
+                    lambda: make_ssh_config(api.servers, bastionless).encode(),
+                )
+                return self._send(200, body, "text/plain")
+            if url.path == "/ssh-tools/ssh-keylist/":
+                authorization = self.headers.get("Authorization", "")
+                if authorization[len("Bearer ") :] not in api.sessions:
+                    return self._json(401, {"detail": "Not authenticated"})
+                body = render(
+                    ("keylist", ""),
+                    lambda: json.dumps({"result": api.keys}).encode(),
+                )
+                return self._send(200, body)
+            self._json(404, {"detail": "Not found"})
+
+        def do_POST(self) -> None:
+            url = urlparse(self.path)
+            api.count(url.path)
+            api.delay()
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._json(400, {"detail": "Invalid JSON"})
+            if url.path == "/login/":
+                if payload != api.credentials:
+                    return self._json(401, {"detail": "Invalid credentials"})
+                session_key = secrets.token_hex(16)
+                api.sessions.add(session_key)
+                return self._json(200, {"session_key": session_key})
+            self._json(404, {"detail": "Not found"})
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--servers", type=int, default=1000)
+    parser.add_argument("--groups", type=int, default=8)
+    parser.add_argument("--keys", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to each request"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Extra random delay, in seconds"
+    )
+    parser.add_argument("--api-key", default="bench-access-key")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    api = FakeJinn(
+        servers=args.servers,
+        groups=args.groups,
+        keys=args.keys,
+        page_size=args.page_size,
+        latency=args.latency,
+        jitter=args.jitter,
+        api_key=args.api_key,
+        seed=args.seed,
+    )
+    print(
+        f"Serving {args.servers} servers on http://{args.host}:{args.port} "
+        f"(access key {args.api_key!r}, login {api.credentials})"
+    )
+    try:
+        api.serve_forever(args.host, args.port)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# facts || acl.py
+
+import shlex
+from typing import Dict, List, Optional
+
+from pyinfra.api import FactBase
+
+
+class Acls(FactBase):
+    """
+    Returns the ACL entries of every given path, read with one ``getfacl``
+    run, as ``{entry: permissions}``. Paths that don't exist map to ``None``:
+
+    .. code:: python
+
+        {
+            "/etc/fail2ban": {
+                "user::": "rwx",
+                "user:root:": "rwx",
+                "group::": "r-x",
+                "mask::": "rwx",
+                "other::": "r-x",
+            },
+            "/var/log/lynis-report.dat": None,
+        }
+    """
+
+    def command(self, paths: List[str]) -> str:
+        quoted = " ".join(shlex.quote(path) for path in paths)
+        return (
+            f"for p in {quoted}; do "
+            'if [ -e "$p" ]; then echo "@ $p"; '
+            'getfacl -cp "$p" 2>/dev/null | awk \'{print "a " $0}\'; '
+            'else echo "- $p"; fi; done; true'
+        )
+
+    def process(self, output: List[str]) -> Dict[str, Optional[Dict[str, str]]]:
+        acls: Dict[str, Optional[Dict[str, str]]] = {}
+        current: Optional[Dict[str, str]] = None
+        for line in output:
+            kind, _, value = line.partition(" ")
+            if kind == "@":
+                current = acls[value] = {}
+            elif kind == "-":
+                current = acls[value] = None
+            elif kind == "a" and current is not None:
+                # "user:root:rwx\t#effective:r-x" -> "user:root:", "rwx"
+                entry = value.split("#", 1)[0].strip()
+                if entry:
+                    qualifier, _, permissions = entry.rpartition(":")
+                    current[f"{qualifier}:"] = permissions
+        return acls
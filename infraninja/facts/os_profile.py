@@ -0,0 +1,91 @@
+# facts || os_profile.py
+
+from typing import Any, Dict, List
+
+from pyinfra.api import FactBase
+
+# Binaries the security deploys look for, reported with their path when present
+PROFILE_BINARIES = [
+    "apk",
+    "apt-get",
+    "dnf",
+    "yum",
+    "systemctl",
+    "rc-service",
+    "sysctl",
+    "setfacl",
+    "getfacl",
+    "nft",
+    "iptables",
+    "sshd",
+]
+
+# Package manager binary -> name, in order of preference
+PACKAGE_MANAGERS = [("apt-get", "apt"), ("apk", "apk"), ("dnf", "dnf"), ("yum", "yum")]
+
+
+class OsProfile(FactBase):
+    """
+    Returns what the security deploys need to know about a host, gathered in
+    one command: distribution, version, init system, package manager,
+    architecture and the paths of relevant binaries.
+
+    .. code:: python
+
+        {
+            "distro": "ubuntu",  # os-release ID
+            "name": "Ubuntu",
+            "version": "22.04",
+            "like": ["debian"],
+            "init": "systemd",  # systemd, openrc or None
+            "package_manager": "apt",
+            "arch": "x86_64",
+            "kernel": "5.15.0-91-generic",
+            "binaries": {"sysctl": "/usr/sbin/sysctl", ...},
+        }
+    """
+
+    def command(self) -> str:
+        binaries = " ".join(PROFILE_BINARIES)
+        return (
+            # A subshell, so os-release variables don't leak into the rest
+            "( . /etc/os-release 2>/dev/null || . /usr/lib/os-release 2>/dev/null; "
+            'echo "id=$ID"; echo "name=$NAME"; echo "version=$VERSION_ID"; '
+            'echo "like=$ID_LIKE" ); '
+            'echo "arch=$(uname -m)"; echo "kernel=$(uname -r)"; '
+            "if [ -d /run/systemd/system ]; then echo init=systemd; "
+            "elif [ -d /run/openrc ] || command -v openrc >/dev/null 2>&1; "
+            "then echo init=openrc; fi; "
+            f"for b in {binaries}; do "
+            'p=$(command -v "$b" 2>/dev/null) && echo "bin=$b $p"; '
+            "done; true"
+        )
+
+    def process(self, output: List[str]) -> Dict[str, Any]:
+        values: Dict[str, str] = {}
+        binaries: Dict[str, str] = {}
+        for line in output:
+            key, _, value = line.partition("=")
+            if key == "bin":
+                name, _, path = value.partition(" ")
+                binaries[name] = path
+            else:
+                values[key] = value.strip().strip("\"'")
+
+        name = values.get("name") or None
+        package_manager = next(
+            (manager for binary, manager in PACKAGE_MANAGERS if binary in binaries),
+            None,
+        )
+        return {
+            "distro": (values.get("id") or "").lower() or None,
+            # "Alpine Linux" -> "Alpine", "Debian GNU/Linux" -> "Debian"
+            "name": name.split()[0] if name else None,
+            "version": values.get("version") or None,
+            "like": (values.get("like") or "").lower().split(),
+            "init": values.get("init"),
+            "package_manager": package_manager,
+            "arch": values.get("arch") or None,
+            "kernel": values.get("kernel") or None,
+            "binaries": binaries,
+        }
@@ -0,0 +1,60 @@
+# facts || services.py
+
+import shlex
+from typing import Dict, List, Optional
+
+from pyinfra.api import FactBase
+
+
+class ServiceStates(FactBase):
+    """
+    Returns whether each service exists, is active and is enabled, for
+    systemd or OpenRC, read in one command:
+
+    .. code:: python
+
+        {
+            "cups": {"exists": True, "active": True, "enabled": True},
+            "telnet": {"exists": False, "active": False, "enabled": False},
+        }
+    """
+
+    def command(self, services: List[str], init: str = "systemd") -> str:
+        quoted = " ".join(shlex.quote(service) for service in services)
+        if init == "openrc":
+            check = (
+                'if [ -e "/etc/init.d/$s" ]; then echo LoadState=loaded; '
+                "else echo LoadState=not-found; fi; "
+                'if rc-service "$s" status >/dev/null 2>&1; '
+                "then echo ActiveState=active; fi; "
+                'if ls /etc/runlevels/*/"$s" >/dev/null 2>&1; '
+                "then echo UnitFileState=enabled; fi; "
+            )
+        else:
+            check = (
+                "systemctl show -p LoadState -p ActiveState -p UnitFileState "
+                '"$s.service" 2>/dev/null; '
+            )
+        return f'for s in {quoted}; do echo "@ $s"; {check}done; true'
+
+    def process(self, output: List[str]) -> Dict[str, Dict[str, bool]]:
+        services: Dict[str, Dict[str, bool]] = {}
+        current: Optional[Dict[str, bool]] = None
+        for line in output:
+            if line.startswith("@ "):
+                current = services[line[2:].strip()] = {
+                    "exists": False,
+                    "active": False,
+                    "enabled": False,
+                }
+                continue
+            if current is None:
+                continue
+            key, _, value = line.partition("=")
+            if key == "LoadState":
+                current["exists"] = value not in ("not-found", "")
+            elif key == "ActiveState":
+                current["active"] = value in ("active", "activating", "reloading")
+            elif key == "UnitFileState":
+                current["enabled"] = value in ("enabled", "enabled-runtime")
+        return services
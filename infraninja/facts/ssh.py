@@ -0,0 +1,140 @@
+# facts || ssh.py
+
+import shlex
+from typing import Any, Dict, List, Optional
+
+from pyinfra.api import FactBase
+
+# Marker left next to authorized_keys by infraninja: "<key set digest> <file digest>"
+KEYS_MARKER = ".infraninja_keys"
+
+
+class AuthorizedKeysState(FactBase):
+    """
+    Returns the user, group and home of ``user`` (the connecting user by
+    default), with the SHA-256 of their ``authorized_keys`` and the digests
+    recorded in the infraninja marker, all in one command:
+
+    .. code:: python
+
+        {
+            "user": "ubuntu",
+            "group": "ubuntu",
+            "home": "/home/ubuntu",
+            "file_digest": "9f86d0...",  # None without authorized_keys
+            "marker_keys_digest": "2c26b4...",  # None without a marker
+            "marker_file_digest": "9f86d0...",
+            "managed": ["ssh-ed25519 AAAA... alice@laptop"],  # keys deployed before
+        }
+    """
+
+    def command(self, user: Optional[str] = None) -> str:
+        user_expr = shlex.quote(user) if user else '"$(id -un)"'
+        return (
+            f"u={user_expr}; "
+            # getent also resolves directory users; fall back to /etc/passwd
+            'h=$( (getent passwd "$u" || grep "^$u:" /etc/passwd) | cut -d: -f6); '
+            'echo "user=$u"; echo "group=$(id -gn "$u")"; echo "home=$h"; '
+            'f="$h/.ssh/authorized_keys"; '
+            '[ -f "$f" ] && echo "file_digest=$(sha256sum "$f" | cut -d" " -f1)"; '
+            f'm="$h/.ssh/{KEYS_MARKER}"; '
+            '[ -f "$m" ] && echo "marker=$(head -n 1 "$m")" && '
+            "tail -n +2 \"$m\" | sed 's/^/managed=/'; "
+            "true"
+        )
+
+    def process(self, output: List[str]) -> Dict[str, Any]:
+        managed: List[str] = []
+        state: Dict[str, Any] = {
+            "user": None,
+            "group": None,
+            "home": None,
+            "file_digest": None,
+            "marker_keys_digest": None,
+            "marker_file_digest": None,
+            "managed": managed,
+        }
+        for line in output:
+            key, _, value = line.partition("=")
+            if key == "managed":
+                if value.strip():
+                    managed.append(value)
+            elif key == "marker":
+                digests = value.split()
+                if len(digests) == 2:
+                    state["marker_keys_digest"], state["marker_file_digest"] = digests
+            elif key in state:
+                state[key] = value or None
+        return state
+
+
+class AuthorizedKeys(FactBase):
+    """
+    Returns the ``authorized_keys`` lines and the infraninja marker of every
+    given user, read in one command. Users that don't exist map to ``None``:
+
+    .. code:: python
+
+        {
+            "deploy": {
+                "group": "deploy",
+                "home": "/home/deploy",
+                "lines": ["ssh-ed25519 AAAA... alice@laptop"],
+                "marker_keys_digest": "2c26b4...",  # None without a marker
+                "managed": ["ssh-ed25519 AAAA... alice@laptop"],
+            },
+            "ghost": None,
+        }
+    """
+
+    def command(self, users: List[str]) -> str:
+        quoted = " ".join(shlex.quote(user) for user in users)
+        # Every line is prefixed (user header "@", key "k", marker "m"), so
+        # file contents can never be mistaken for a header
+        return (
+            f"for u in {quoted}; do "
+            'h=$( (getent passwd "$u" || grep "^$u:" /etc/passwd) | cut -d: -f6); '
+            'if [ -z "$h" ]; then echo "@ $u"; continue; fi; '
+            'echo "@ $u $(id -gn "$u") $h"; '
+            'f="$h/.ssh/authorized_keys"; '
+            '[ -f "$f" ] && awk \'{print "k " $0}\' "$f"; '
+            f'm="$h/.ssh/{KEYS_MARKER}"; '
+            '[ -f "$m" ] && awk \'{print "m " $0}\' "$m"; '
+            "done; true"
+        )
+
+    def process(self, output: List[str]) -> Dict[str, Optional[Dict]]:
+        users: Dict[str, Optional[Dict]] = {}
+        current: Optional[Dict] = None
+        marker: List[str] = []
+
+        def finish() -> None:
+            if current is not None and marker:
+                digests = marker[0].split()
+                current["marker_keys_digest"] = digests[0] if digests else None
+                current["managed"] = [line for line in marker[1:] if line.strip()]
+
+        for line in output:
+            kind, _, value = line.partition(" ")
+            if kind == "@":
+                finish()
+                marker = []
+                parts = value.split(None, 2)
+                if len(parts) < 3:
+                    current = users[parts[0]] = None
+                    continue
+                current = users[parts[0]] = {
+                    "group": parts[1],
+                    "home": parts[2],
+                    "lines": [],
+                    "marker_keys_digest": None,
+                    "managed": [],
+                }
+            elif current is None:
+                continue
+            elif kind == "k":
+                current["lines"].append(value)
+            elif kind == "m":
+                marker.append(value)
+        finish()
+        return users
@@ -0,0 +1,71 @@
+# facts || sysctl.py
+
+import shlex
+from typing import Any, Dict, List, Optional
+
+from pyinfra.api import FactBase
+
+
+def sysctl_path(key: str) -> str:
+    return "/proc/sys/" + key.replace(".", "/")
+
+
+def normalize_value(value: Any) -> str:
+    """Values as sysctl prints them: fields separated by single spaces."""
+    return " ".join(str(value).split())
+
+
+class SysctlState(FactBase):
+    """
+    Returns the live value of every given sysctl key, ``None`` for keys this
+    kernel doesn't have, the keys that exist but can't be read (write-only or
+    restricted), and the lines of the settings file ``path`` (``None`` when
+    missing), all in one command:
+
+    .. code:: python
+
+        {
+            "values": {"kernel.sysrq": "0", "net.ipv6.conf.all.forwarding": None},
+            "unreadable": ["vm.compact_memory"],
+            "file": ["kernel.sysrq = 0"],
+        }
+    """
+
+    def command(self, keys: List[str], path: str) -> str:
+        checks = " ".join(
+            f"{shlex.quote(key)} {shlex.quote(sysctl_path(key))}" for key in keys
+        )
+        quoted_path = shlex.quote(path)
+        return (
+            f"set -- {checks}; "
+            'while [ "$#" -gt 1 ]; do '
+            'if [ ! -e "$2" ]; then echo "u $1"; '
+            'elif v=$(tr "\\t\\n" "  " < "$2" 2>/dev/null); then echo "k $1 $v"; '
+            'else echo "r $1"; fi; shift 2; done; '
+            f"[ -f {quoted_path} ] && {{ echo F; awk '{{print \"f \" $0}}' {quoted_path}; }}; "
+            "true"
+        )
+
+    def process(self, output: List[str]) -> Dict[str, Any]:
+        values: Dict[str, Optional[str]] = {}
+        unreadable: List[str] = []
+        lines: List[str] = []
+        has_file = False
+        for line in output:
+            kind, _, rest = line.partition(" ")
+            if kind == "k":
+                key, _, value = rest.partition(" ")
+                values[key] = normalize_value(value)
+            elif kind == "u":
+                values[rest.strip()] = None
+            elif kind == "r":
+                unreadable.append(rest.strip())
+            elif kind == "F":
+                has_file = True
+            elif kind == "f":
+                lines.append(rest)
+        return {
+            "values": values,
+            "unreadable": unreadable,
+            "file": lines if has_file else None,
+        }
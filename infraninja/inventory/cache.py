@@ -0,0 +1,143 @@
+# inventory || cache.py
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+
+from .client import get_session
+from .files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Size of the chunks read from cached bodies and streamed responses
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseCache:
+    """
+    On-disk cache for Jinn API responses, revalidated with ETag/Last-Modified.
+
+    Entries are scoped by API URL and access key (which identifies the
+    project), so different projects never share cached inventories. Each entry
+    is a single file: one JSON header line holding the validators, followed by
+    the raw response body. The file mtime records when it was last validated.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        api_url: str,
+        api_key: str,
+        ttl: int = 0,
+        offline: bool = False,
+    ) -> None:
+        scope = hashlib.sha256(f"{api_url.rstrip('/')}\0{api_key}".encode()).hexdigest()
+        self.cache_dir = Path(cache_dir) / "http" / scope[:16]
+        self.ttl = ttl
+        self.offline = offline
+
+    def _entry_path(self, url: str, params: Optional[Dict[str, Any]]) -> Path:
+        key = json.dumps([url, sorted((params or {}).items())], default=str)
+        return self.cache_dir / hashlib.sha256(key.encode()).hexdigest()
+
+    @staticmethod
+    def _read_header(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "rb") as file:
+                return json.loads(file.readline())
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _read_body(path: Path) -> Iterator[bytes]:
+        with open(path, "rb") as file:
+            file.readline()  # Skip the header line
+            while True:
+                chunk = file.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    def _is_fresh(self, path: Path) -> bool:
+        return self.ttl > 0 and time.time() - path.stat().st_mtime < self.ttl
+
+    def _store(self, path: Path, response: requests.Response) -> Iterator[bytes]:
+        """Yield the response body while writing it to the cache atomically."""
+        header = {
+            "url": response.url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        with atomic_write(path, "wb") as file:
+            file.write(json.dumps(header).encode() + b"\n")
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                file.write(chunk)
+                yield chunk
+
+    def stream(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+    ) -> Iterator[bytes]:
+        """
+        Yield the body of a GET request in chunks, from the cache when it is
+        still fresh (or unchanged on the server), otherwise from the network.
+        """
+        path = self._entry_path(url, params)
+        header = self._read_header(path)
+
+        if header is not None and (self.offline or self._is_fresh(path)):
+            logger.debug("Using cached response for %s", url)
+            yield from self._read_body(path)
+            return
+        if self.offline:
+            raise RuntimeError(f"Offline mode enabled and no cached copy of {url}")
+
+        request_headers = dict(headers or {})
+        if header is not None:
+            if header.get("etag"):
+                request_headers["If-None-Match"] = header["etag"]
+            if header.get("last_modified"):
+                request_headers["If-Modified-Since"] = header["last_modified"]
+
+        try:
+            response = get_session().get(
+                url,
+                headers=request_headers,
+                params=params,
+                stream=True,
+                timeout=timeout,
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if header is None:
+                raise
+            logger.warning("Could not reach %s (%s), using cached copy", url, e)
+            yield from self._read_body(path)
+            return
+
+        with response:
+            if response.status_code == 304 and header is not None:
+                logger.debug("Cached response for %s is still valid", url)
+                os.utime(path)
+                yield from self._read_body(path)
+                return
+            response.raise_for_status()
+            yield from self._store(path, response)
+
+    def get_text(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+    ) -> str:
+        """Return the full body of a (possibly cached) GET request as text."""
+        return b"".join(self.stream(url, headers, params, timeout)).decode("utf-8")
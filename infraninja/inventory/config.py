@@ -1,9 +1,39 @@
+import json
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 from pathlib import Path
 
 
+@dataclass
+class JinnEndpoint:
+    """A Jinn API endpoint (project/region) to pull inventory from."""
+
+    name: str
+    api_url: str
+    api_key: str
+
+    @classmethod
+    def parse_list(cls, raw: str) -> List["JinnEndpoint"]:
+        """
+        Parse a JSON list of ``{"name", "api_url", "api_key"}`` objects. The key
+        may be given as ``api_key_env``, naming the variable that holds it.
+        """
+        endpoints = []
+        for i, item in enumerate(json.loads(raw)):
+            api_key = item.get("api_key") or os.environ.get(item.get("api_key_env", ""))
+            if not item.get("api_url") or not api_key:
+                raise ValueError(f"Endpoint {i} needs an api_url and an api_key")
+            endpoints.append(
+                cls(
+                    name=item.get("name") or f"endpoint{i}",
+                    api_url=item["api_url"],
+                    api_key=api_key,
+                )
+            )
+        return endpoints
+
+
 @dataclass
 class NinjaConfig:
     """Configuration class for Infraninja."""
@@ -14,8 +44,31 @@ class NinjaConfig:
     main_ssh_config: Path = Path.home() / ".ssh/config"
     default_ssh_config_filename: str = "bastionless_ssh_config"
     ssh_key_path: Path = Path.home() / ".ssh/id_rsa"
+    ssh_config_filename: Optional[str] = None
     api_url: Optional[str] = None
     api_key: Optional[str] = None
+    selector: Optional[str] = None  # e.g. "group:web & (tag:prod | tag:canary)"
+    delta: bool = False  # Only return hosts added/changed since the last snapshot
+    delta_commit: bool = False  # Save the snapshot at load, not after the deploy
+    shard: Optional[str] = None  # "i/N": only keep this runner's slice of hosts
+    endpoints: List[JinnEndpoint] = field(default_factory=list)
+    endpoint_timeout: float = 120  # Seconds to wait for endpoints when aggregating
+    cache_dir: Path = Path.home() / ".cache/infraninja"
+    cache_ttl: int = 0  # Seconds a cached response is reused without revalidation
+    offline: bool = False  # Serve only from the cache, never hit the API
+    session_cache: bool = True  # Persist the login session and SSH key list
+    session_ttl: int = 12 * 3600  # Seconds a cached login session is reused
+    keys_ttl: int = 300  # Seconds the key list is reused without revalidation
+    cache_passphrase: Optional[str] = None  # Encrypt the session cache with this
+    cache_keyring: bool = False  # Encrypt the session cache with a keyring secret
+    ssh_multiplex: bool = False  # Add connection reuse to the generated SSH config
+    ssh_control_dir: Path = Path.home() / ".ssh/cm"  # ControlMaster sockets
+    ssh_control_persist: str = "10m"  # How long idle master connections stay up
+    ssh_keepalive: int = 30  # ServerAliveInterval, in seconds
+    ssh_key_map: Optional[Path] = None  # JSON of selector -> key, per host/group
+    ssh_agent_preload: bool = False  # ssh-add the hosts' keys once when loading
+    fact_cache: bool = False  # Reuse facts gathered by earlier runs
+    fact_ttl: int = 3600  # Seconds a cached fact is reused, unless set per fact
 
     @classmethod
     def from_env(cls) -> "NinjaConfig":
@@ -23,6 +76,47 @@ class NinjaConfig:
         return cls(
             api_url=os.environ.get("JINN_API_URL"),
             api_key=os.environ.get("JINN_ACCESS_KEY"),
+            ssh_key_path=Path(
+                os.environ.get("SSH_KEY_PATH", Path.home() / ".ssh/id_rsa")
+            ),
+            ssh_config_filename=os.environ.get("JINN_SSH_CONFIG_FILENAME"),
+            selector=os.environ.get("JINN_SELECTOR"),
+            delta=os.environ.get("JINN_DELTA", "").lower() in ("1", "true", "yes"),
+            delta_commit=os.environ.get("JINN_DELTA_COMMIT", "").lower()
+            in ("1", "true", "yes"),
+            shard=os.environ.get("JINN_SHARD"),
+            endpoints=JinnEndpoint.parse_list(os.environ.get("JINN_ENDPOINTS", "[]")),
+            endpoint_timeout=float(os.environ.get("JINN_ENDPOINT_TIMEOUT", "120")),
+            cache_dir=Path(
+                os.environ.get("JINN_CACHE_DIR", Path.home() / ".cache/infraninja")
+            ),
+            cache_ttl=int(os.environ.get("JINN_CACHE_TTL", "0")),
+            offline=os.environ.get("JINN_OFFLINE", "").lower() in ("1", "true", "yes"),
+            session_cache=os.environ.get("JINN_SESSION_CACHE", "1").lower()
+            in ("1", "true", "yes"),
+            session_ttl=int(os.environ.get("JINN_SESSION_TTL", str(12 * 3600))),
+            keys_ttl=int(os.environ.get("JINN_KEYS_TTL", "300")),
+            cache_passphrase=os.environ.get("JINN_CACHE_PASSPHRASE"),
+            cache_keyring=os.environ.get("JINN_CACHE_KEYRING", "").lower()
+            in ("1", "true", "yes"),
+            ssh_multiplex=os.environ.get("JINN_SSH_MULTIPLEX", "").lower()
+            in ("1", "true", "yes"),
+            ssh_control_dir=Path(
+                os.environ.get("JINN_SSH_CONTROL_DIR", Path.home() / ".ssh/cm")
+            ),
+            ssh_control_persist=os.environ.get("JINN_SSH_CONTROL_PERSIST", "10m"),
+            ssh_keepalive=int(os.environ.get("JINN_SSH_KEEPALIVE", "30")),
+            ssh_key_map=(
+                Path(os.environ["JINN_SSH_KEY_MAP"])
+                if os.environ.get("JINN_SSH_KEY_MAP")
+                else None
+            ),
+            ssh_agent_preload=os.environ.get("JINN_SSH_AGENT_PRELOAD", "").lower()
+            in ("1", "true", "yes"),
+            fact_cache=os.environ.get("JINN_FACT_CACHE", "").lower()
+            in ("1", "true", "yes"),
+            fact_ttl=int(os.environ.get("JINN_FACT_TTL", "3600")),
         )
 
+
 default_config = NinjaConfig()
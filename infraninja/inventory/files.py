@@ -0,0 +1,30 @@
+# inventory || files.py
+
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Any, Iterator, Optional, Union
+
+
+@contextmanager
+def atomic_write(
+    path: Union[str, "os.PathLike[str]"], mode: str = "w", chmod: Optional[int] = None
+) -> Iterator[IO[Any]]:
+    """
+    Open a temporary file next to ``path`` that replaces it once the block
+    exits cleanly, so readers (and concurrent runs) never see a partial file.
+    On error the temporary file is removed and ``path`` is left untouched.
+    Missing directories are created 0700; the file is 0600 unless ``chmod``.
+    """
+    directory = os.path.dirname(os.fspath(path)) or "."
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, mode) as file:
+            yield file
+        if chmod is not None:
+            os.chmod(tmp_path, chmod)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
@@ -0,0 +1,119 @@
+# inventory || hosts.py
+
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .keys import KEY_HINT_FIELD
+
+# Server keys that never end up in host data or are stored separately. The
+# SSH key hint is resolved to a path and stored in the defaults.
+_RESERVED_KEYS = frozenset(
+    {
+        "attributes",
+        "ssh_user",
+        "is_active",
+        "group",
+        "tags",
+        "ssh_hostname",
+        KEY_HINT_FIELD,
+    }
+)
+
+_shared_defaults: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+_shared_tags: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def shared_defaults(**values: Any) -> Dict[str, Any]:
+    """
+    Return a dict of defaults shared by every host with the same values (e.g.
+    one per group and SSH key), instead of a copy per host. Treat as read-only.
+    """
+    key = tuple(sorted(values.items()))
+    defaults = _shared_defaults.get(key)
+    if defaults is None:
+        defaults = _shared_defaults[key] = {
+            sys.intern(name): _intern(value) for name, value in values.items()
+        }
+    return defaults
+
+
+def shared_tags(tags: Any) -> Tuple[str, ...]:
+    """Return an interned tuple of tags, shared by hosts with the same tags."""
+    key = tuple(_intern(tag) for tag in tags or ())
+    return _shared_tags.setdefault(key, key)
+
+
+class HostRecord(MutableMapping):
+    """
+    Compact host data for one server.
+
+    Only per-host values are stored on the record; values common to many hosts
+    (group name, SSH key, ...) live in a ``defaults`` dict shared between them
+    and are resolved by layered lookup. Keys and repeated strings are interned.
+    """
+
+    __slots__ = ("data", "defaults")
+
+    def __init__(self, data: Dict[str, Any], defaults: Dict[str, Any]) -> None:
+        self.data = data
+        self.defaults = defaults
+
+    @classmethod
+    def from_server(
+        cls, server: Dict[str, Any], defaults: Dict[str, Any]
+    ) -> "HostRecord":
+        """Build a record from a server returned by the inventory API."""
+        # Only keys and low-cardinality values are interned; interning unique
+        # values such as addresses would just grow the intern table.
+        data = {
+            sys.intern(key): value
+            for key, value in (server.get("attributes") or {}).items()
+            if key != KEY_HINT_FIELD
+        }
+        data["ssh_user"] = _intern(server.get("ssh_user"))
+        data["tags"] = shared_tags(server.get("tags"))
+        for key, value in server.items():
+            if key not in _RESERVED_KEYS:
+                data[sys.intern(key)] = value
+        return cls(data, defaults)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self.data[key]
+        except KeyError:
+            return self.defaults[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.data[sys.intern(key)] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self.data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.data
+        for key in self.defaults:
+            if key not in self.data:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self.data) + sum(1 for key in self.defaults if key not in self.data)
+
+    def __repr__(self) -> str:
+        return f"HostRecord({dict(self)!r})"
+
+    def own_data(self, group_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Return the host data pyinfra needs on top of ``group_data``: only the
+        per-host values when this record shares the group's defaults.
+        """
+        if group_data is None or self.defaults is group_data:
+            return self.data
+        return {
+            **{k: v for k, v in self.defaults.items() if group_data.get(k) != v},
+            **self.data,
+        }
@@ -1,15 +1,59 @@
 # inventory || jinn.py
 
-import glob
+import argparse
+import json
 import logging
 import os
 import sys
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+from urllib.parse import urljoin
+
+if not globals().get("__package__"):
+    # Executed as a file: make the infraninja package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-sys.path.append(str(Path(__file__).parent.parent))
 import requests
-from inventory.config import NinjaConfig
+from infraninja.inventory.cache import ResponseCache
+from infraninja.inventory.config import JinnEndpoint, NinjaConfig
+from infraninja.inventory.hosts import HostRecord, shared_defaults
+from infraninja.inventory.jsonstream import iter_json_items
+from infraninja.inventory.keys import (
+    KeyInfo,
+    KeyResolver,
+    KeyScanner,
+    preload_ssh_agent,
+)
+from infraninja.inventory.selector import InventoryIndex, filter_servers, server_terms
+from infraninja.inventory.sharding import filter_shard, parse_shard
+from infraninja.inventory.snapshot import (
+    InventoryDelta,
+    InventorySnapshot,
+    changed_hosts,
+    snapshot_name,
+)
+from infraninja.inventory.sshconfig import (
+    add_include,
+    augment_ssh_config,
+    has_include,
+    remove_block_includes,
+    rename_hosts,
+    write_if_changed,
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,75 +61,98 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-config = NinjaConfig.from_env()
-
 
-def get_groups_from_data(data):
-    """Extract unique groups from server data."""
-    groups = set()
-    for server in data.get("result", []):
-        group = server.get("group", {}).get("name_en")
-        if group:
-            groups.add(group)
-    return sorted(list(groups))
-
-
-def get_tags_from_data(servers: List[Dict]) -> List[str]:
-    """Extract unique tags from server data."""
-    tags = set()
-    for server in servers:
-        for tag in server.get("tags", []):
-            if tag and not tag.isspace():  # Skip empty or whitespace-only tags
-                tags.add(tag)
-    return sorted(list(tags))
+def get_response_cache(
+    api_auth_key: str, base_api_url: str, config: Optional[NinjaConfig] = None
+) -> ResponseCache:
+    """Return the on-disk response cache for an API URL and access key."""
+    config = config or NinjaConfig.from_env()
+    return ResponseCache(
+        config.cache_dir,
+        base_api_url,
+        api_auth_key,
+        ttl=config.cache_ttl,
+        offline=config.offline,
+    )
 
 
 def fetch_ssh_config(
-    api_auth_key: str, base_api_url: str, bastionless: bool = True
+    api_auth_key: str,
+    base_api_url: str,
+    bastionless: bool = True,
+    config: Optional[NinjaConfig] = None,
 ) -> str:
     """
     Fetch the SSH config from the API using an API key for authentication and return its content.
     """
+    config = config or NinjaConfig.from_env()
     headers = {"Authentication": api_auth_key}
     endpoint = f"{base_api_url.rstrip('/')}{config.ssh_config_endpoint}"
+    cache = get_response_cache(api_auth_key, base_api_url, config)
     try:
-        response = requests.get(
+        return cache.get_text(
             endpoint, headers=headers, params={"bastionless": bastionless}, timeout=10
         )
-        response.raise_for_status()
-        return response.text
     except requests.RequestException as e:
         raise RuntimeError(f"Failed to fetch SSH config: {e}")
 
 
-def save_ssh_config(ssh_config_content: str, ssh_config_filename: str) -> None:
+def save_ssh_config(
+    ssh_config_content: str,
+    ssh_config_filename: str,
+    config: Optional[NinjaConfig] = None,
+    identity_file: Optional[str] = None,
+    identity_files: Optional[Dict[str, str]] = None,
+) -> None:
     """
-    Save the SSH config content to a file in the SSH config directory.
+    Save the SSH config content to a file in the SSH config directory. With
+    ``ssh_multiplex`` enabled, connection reuse settings are added first,
+    pinning each host to its own key from ``identity_files`` when given.
     """
-    os.makedirs(config.ssh_config_dir, exist_ok=True)
+    config = config or NinjaConfig.from_env()
+    if config.ssh_multiplex:
+        os.makedirs(config.ssh_control_dir, mode=0o700, exist_ok=True)
+        ssh_config_content = augment_ssh_config(
+            ssh_config_content,
+            control_dir=str(config.ssh_control_dir),
+            control_persist=config.ssh_control_persist,
+            keepalive=config.ssh_keepalive,
+            identity_file=identity_file,
+            identity_files=identity_files,
+        )
     config_path = os.path.join(config.ssh_config_dir, ssh_config_filename)
-    with open(config_path, "w") as file:
-        file.write(ssh_config_content)
-    print("")
-    logger.info("Saved SSH config to: %s", config_path)
+    if write_if_changed(config_path, ssh_config_content):
+        print("")
+        logger.info("Saved SSH config to: %s", config_path)
+    else:
+        logger.info("SSH config %s is up to date", config_path)
 
 
-def update_main_ssh_config():
+def update_main_ssh_config(config: Optional[NinjaConfig] = None) -> None:
     """
-    Ensure the main .ssh/config includes the SSH config directory.
+    Ensure the main .ssh/config includes the SSH config directory, from the top
+    of the file so the include applies to every host. The line older versions
+    appended at the end is removed.
     """
-    include_line = f"\nInclude {config.ssh_config_dir}/*\n"
-    if os.path.exists(config.main_ssh_config):
+    config = config or NinjaConfig.from_env()
+    include = f"{config.ssh_config_dir}/*"
+    try:
         with open(config.main_ssh_config, "r") as file:
-            if include_line in file.read():
-                return  # Already included
+            content = file.read()
+    except FileNotFoundError:
+        content = ""
 
-    with open(config.main_ssh_config, "a") as file:
-        file.write(include_line)
-    logger.info("Updated main SSH config to include: %s/*", config.ssh_config_dir)
+    ssh_dir = str(config.main_ssh_config.parent)
+    updated = remove_block_includes(content, include, ssh_dir)
+    if not has_include(updated, include, ssh_dir):
+        updated = add_include(updated, include)
+    if write_if_changed(str(config.main_ssh_config), updated):
+        logger.info("Updated main SSH config to include: %s", include)
 
 
-def get_valid_filename(default_name: str = config.default_ssh_config_filename) -> str:
+def get_valid_filename(
+    default_name: str = NinjaConfig.default_ssh_config_filename,
+) -> str:
     """Get a valid filename from user input."""
     while True:
         input_filename = input(
@@ -107,173 +174,284 @@ def get_valid_filename(default_name: str = config.default_ssh_config_filename) -
         return input_filename
 
 
-def get_project_name(data: Dict) -> str:
-    """Extract project name from server data."""
-    if not data.get("result"):
-        return "default"
+def iter_servers(
+    server_auth_key: str, server_api_url: str, config: Optional[NinjaConfig] = None
+) -> Iterator[Dict]:
+    """
+    Stream servers from the inventory API one at a time, following pagination
+    links. Each page is parsed incrementally, so the full payload is never held
+    in memory, and is served from the response cache when unchanged.
+    """
+    config = config or NinjaConfig.from_env()
+    cache = get_response_cache(server_auth_key, server_api_url, config)
+    url = f"{server_api_url.rstrip('/')}{config.inventory_endpoint}"
+    headers = {"Authentication": server_auth_key}
+    while url:
+        meta: Dict[str, Any] = {}
+        yield from iter_json_items(cache.stream(url, headers=headers), meta=meta)
+        next_url = meta.get("next")
+        url = urljoin(url, next_url) if next_url else None
+
+
+def track_project(servers: Iterable[Dict], catalog: Dict[str, Any]) -> Iterator[Dict]:
+    """Pass servers through, recording the first project name seen in the catalog."""
+    catalog.setdefault("project", "default")
+    for server in servers:
+        if catalog["project"] == "default":
+            project = server.get("group", {}).get("project", {})
+            if project and project.get("name_en"):
+                catalog["project"] = project["name_en"]
+        yield server
+
+
+def spool_servers(servers: Iterable[Dict], spool: IO[str]) -> Dict[str, Any]:
+    """
+    Write streamed servers to a spool file as JSON lines while collecting the
+    small catalog needed for selection: every group, the tags of its active
+    servers and the project name.
+    """
+    catalog: Dict[str, Any] = {"groups": {}}
+    for server in track_project(servers, catalog):
+        spool.write(json.dumps(server, separators=(",", ":")))
+        spool.write("\n")
+
+        group_name = server.get("group", {}).get("name_en")
+        if not group_name:
+            continue
+        group_tags = catalog["groups"].setdefault(group_name, set())
+        if server.get("is_active", False):
+            group_tags.update(
+                tag for tag in server.get("tags", []) if tag and not tag.isspace()
+            )
+    spool.flush()
+    return catalog
+
+
+def iter_spool(spool: IO[str]) -> Iterator[Dict]:
+    """Read servers back from a spool file written by ``spool_servers``."""
+    spool.seek(0)
+    for line in spool:
+        yield json.loads(line)
+
+
+def select_servers(
+    servers: Iterable[Dict],
+    selected_groups: Iterable[str],
+    selected_tags: Optional[Iterable[str]] = None,
+) -> Iterator[Dict]:
+    """
+    Lazily filter servers down to active members of the selected groups/tags.
+    ``selected_tags=None`` keeps every tag; an empty set keeps no server.
+    """
+    selected_groups = set(selected_groups)
+    selected_tags = set(selected_tags) if selected_tags is not None else None
+    for server in servers:
+        if not server.get("is_active", False):
+            continue
+        if server.get("group", {}).get("name_en") not in selected_groups:
+            continue
+        if selected_tags is not None and selected_tags.isdisjoint(
+            server.get("tags", [])
+        ):
+            continue
+        yield server
+
+
+def build_host(
+    server: Dict,
+    ssh_key_path: Optional[str] = None,
+    key_resolver: Optional[KeyResolver] = None,
+) -> Tuple[str, HostRecord]:
+    """
+    Convert a server record from the API into a pyinfra host tuple. Values
+    common to a whole group (group name, SSH key, active flag) are shared
+    between hosts rather than copied into each one. With a ``key_resolver``
+    the SSH key is chosen per server instead of using ``ssh_key_path``.
+    """
+    defaults = shared_defaults(
+        group_name=server.get("group", {}).get("name_en"),
+        is_active=server.get("is_active", False),
+        ssh_key=key_resolver.resolve(server) if key_resolver else ssh_key_path,
+    )
+    return sys.intern(server["hostname"]), HostRecord.from_server(server, defaults)
+
+
+def prompt_groups(groups: List[str], interactive: bool = True) -> List[str]:
+    """
+    Display available groups and return the ones chosen by the user, or via
+    ``JINN_GROUPS``. Without a terminal and no ``JINN_GROUPS`` all groups are used.
+    """
+    logger.info("\nAvailable groups:")
+    for i, group in enumerate(groups, 1):
+        logger.info("%d. %s", i, group)
+
+    while True:
+        if os.environ.get("JINN_GROUPS"):
+            choice = os.environ.get("JINN_GROUPS").strip()
+        elif not interactive:
+            choice = "*"
+        else:
+            choice = input(
+                "\nEnter group numbers (space-separated) or '*' for all groups: "
+            ).strip()
+        if choice in ("*", ""):
+            selected_groups = groups
+            break
+        try:
+            # Split input and convert to integers
+            choices = [int(x) for x in choice.split()]
+            # Validate all choices
+            if all(1 <= x <= len(groups) for x in choices):
+                selected_groups = [groups[i - 1] for i in choices]
+                break
+            logger.warning("Invalid choice. Please select valid numbers.")
+        except ValueError:
+            logger.warning("Please enter valid numbers or '*'.")
+
+    logger.info("\nSelected groups: %s", ", ".join(selected_groups))
+    return selected_groups
+
+
+def prompt_tags(tags: List[str], interactive: bool = True) -> Optional[Set[str]]:
+    """
+    Display available tags and return the chosen ones, or None for all.
+    Invalid numbers never widen the selection: they are asked for again
+    interactively, and from ``JINN_TAGS`` they are ignored, so a selection
+    with no valid number selects no servers.
+    """
+    if not tags:
+        return None
+
+    logger.info("\nAvailable tags:")
+    for i, tag in enumerate(tags, 1):
+        logger.info("%2d. %s", i, tag)  # Align numbers for better readability
 
-    # Get the first server that has project information
-    for server in data["result"]:
-        project = server.get("group", {}).get("project", {})
-        if project and project.get("name_en"):
-            return project["name_en"]
+    while True:
+        from_env = bool(os.environ.get("JINN_TAGS"))
+        if from_env:
+            tag_choice = os.environ.get("JINN_TAGS").strip()
+        elif not interactive:
+            tag_choice = "*"
+        else:
+            tag_choice = input(
+                "\nSelect tags (space-separated), '*' or Enter for all: "
+            ).strip()
 
-    return "default"
+        if not tag_choice or tag_choice == "*":
+            return None
+        choices = tag_choice.split()
+        invalid = [
+            choice
+            for choice in choices
+            if not choice.isdigit() or not 1 <= int(choice) <= len(tags)
+        ]
+        if invalid and not from_env:
+            logger.warning("Invalid tag selection: %s", " ".join(invalid))
+            continue
+        if invalid:
+            logger.warning(
+                "Ignoring invalid tag selection in JINN_TAGS: %s", " ".join(invalid)
+            )
+        selected = {
+            tags[int(choice) - 1] for choice in choices if choice not in invalid
+        }
+        if not selected:
+            logger.warning("No valid tags selected, no servers will be selected")
+        return selected
 
 
 def fetch_servers(
-    server_auth_key: str, server_api_url: str, selected_group: str = None
+    server_auth_key: str,
+    server_api_url: str,
+    selected_group: str = None,
+    ssh_key_path: Optional[str] = None,
+    config: Optional[NinjaConfig] = None,
+    interactive: bool = True,
+    selector: Optional[str] = None,
+    key_resolver: Optional[KeyResolver] = None,
+    raise_errors: bool = False,
 ) -> Tuple[List[Tuple[str, Dict[str, Any]]], str]:
+    """
+    Fetch the selected hosts and the project name. With a selector expression
+    (see ``inventory.selector``) no prompts are shown and servers are filtered
+    while streaming; otherwise groups and tags are chosen by number.
+
+    Errors are logged and give no hosts, unless ``raise_errors`` is set.
+    """
     try:
-        # API call for servers
-        headers = {"Authentication": server_auth_key}
-        response = requests.get(
-            f"{server_api_url.rstrip('/')}{config.inventory_endpoint}", headers=headers
-        )
-        response.raise_for_status()
-        data = response.json()
-
-        # Extract project name early
-        detected_project_name = get_project_name(data)
-
-        # First, display available groups sorted alphabetically
-        groups = get_groups_from_data(data)
-        logger.info("\nAvailable groups:")
-        for i, group in enumerate(groups, 1):
-            logger.info("%d. %s", i, group)
-
-        # If no group is selected, prompt for selection
-        if selected_group is None:
-            while True:
-                if os.environ.get("JINN_GROUPS"):
-                    choice = os.environ.get("JINN_GROUPS").strip()
-                else:
-                    choice = input(
-                        "\nEnter group numbers (space-separated) or '*' for all groups: "
-                    ).strip()
-                if choice in ("*", ""):
-                    selected_groups = groups
-                    break
-                try:
-                    # Split input and convert to integers
-                    choices = [int(x) for x in choice.split()]
-                    # Validate all choices
-                    if all(1 <= x <= len(groups) for x in choices):
-                        selected_groups = [groups[i - 1] for i in choices]
-                        break
-                    logger.warning("Invalid choice. Please select valid numbers.")
-                except ValueError:
-                    logger.warning("Please enter valid numbers or '*'.")
-
-            logger.info("\nSelected groups: %s", ", ".join(selected_groups))
+        if selector:
+            catalog: Dict[str, Any] = {}
+            servers = track_project(
+                iter_servers(server_auth_key, server_api_url, config), catalog
+            )
+            hosts = [
+                build_host(server, ssh_key_path, key_resolver)
+                for server in filter_servers(servers, selector)
+            ]
+            return hosts, catalog["project"]
 
-        else:
-            selected_groups = [selected_group]
-
-        # Filter servers by selected groups first
-        filtered_servers = [
-            server
-            for server in data.get("result", [])
-            if server.get("group", {}).get("name_en") in selected_groups
-            and server.get("is_active", False)
-        ]
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+            # Single streaming pass over the API: only the catalog stays in memory
+            catalog = spool_servers(
+                iter_servers(server_auth_key, server_api_url, config), spool
+            )
 
-        # Tag selection with sorted display
-        tags = get_tags_from_data(filtered_servers)
-        if tags:
-            logger.info("\nAvailable tags:")
-            for i, tag in enumerate(tags, 1):
-                logger.info("%2d. %s", i, tag)  # Align numbers for better readability
-            if os.environ.get("JINN_TAGS"):
-                tag_choice = os.environ.get("JINN_TAGS").strip()
+            if selected_group is None:
+                selected_groups = prompt_groups(
+                    sorted(catalog["groups"]), interactive=interactive
+                )
             else:
-                tag_choice = input(
-                    "\nSelect tags (space-separated), '*' or Enter for all: "
-                ).strip()
-
-            if tag_choice and tag_choice != "*":
-                try:
-                    selected_indices = [int(i) - 1 for i in tag_choice.split()]
-                    selected_tags = {
-                        tags[i] for i in selected_indices if 0 <= i < len(tags)
-                    }
-                    # Filter servers by tags
-                    filtered_servers = [
-                        server
-                        for server in filtered_servers
-                        if any(tag in selected_tags for tag in server.get("tags", []))
-                    ]
-                except (ValueError, IndexError):
-                    logger.warning("Invalid tag selection, showing all servers")
-
-        # Convert to host list format
-        hosts = [
-            (
-                server["hostname"],
-                {
-                    **server.get("attributes", {}),
-                    "ssh_user": server.get("ssh_user"),
-                    "is_active": server.get("is_active", False),
-                    "group_name": server.get("group", {}).get("name_en"),
-                    "tags": server.get("tags", []),
-                    "ssh_key": SSH_KEY_PATH,
-                    **{
-                        key: value
-                        for key, value in server.items()
-                        if key
-                        not in [
-                            "attributes",
-                            "ssh_user",
-                            "is_active",
-                            "group",
-                            "tags",
-                            "ssh_hostname",
-                        ]
-                    },
-                },
+                selected_groups = [selected_group]
+
+            tags = sorted(
+                set().union(
+                    *(catalog["groups"].get(group, ()) for group in selected_groups)
+                )
             )
-            for server in filtered_servers
-        ]
+            selected_tags = prompt_tags(tags, interactive=interactive)
 
-        return hosts, detected_project_name
+            # Second pass over the local spool; only selected hosts are materialised
+            hosts = [
+                build_host(server, ssh_key_path, key_resolver)
+                for server in select_servers(
+                    iter_spool(spool), selected_groups, selected_tags
+                )
+            ]
+
+        return hosts, catalog["project"]
 
     except requests.exceptions.RequestException as e:
+        if raise_errors:
+            raise
         logger.error("An error occurred while making the request: %s", e)
         return [], "default"
-    except KeyError as e:
+    except (KeyError, ValueError) as e:
+        if raise_errors:
+            raise
         logger.error("Error parsing response: %s", e)
         return [], "default"
     except Exception as e:
+        if raise_errors:
+            raise
         logger.error("An unexpected error occurred: %s", e)
         return [], "default"
 
 
-def find_ssh_keys() -> List[str]:
+def scan_ssh_keys(scanner: Optional[KeyScanner] = None) -> List[KeyInfo]:
     """
     Find all SSH private keys in the user's .ssh directory.
-    Returns a list of full paths to SSH private key files.
+    Files are recognised by their header, so sockets, backups and other
+    files are never offered. Returns the keys, common names first.
     """
-    ssh_dir = os.path.expanduser("~/.ssh")
-    # List all files in the .ssh directory
-    all_files = glob.glob(os.path.join(ssh_dir, "*"))
-
-    # Filter for likely private keys (no .pub extension and not common non-key files)
-    excluded_files = ["known_hosts", "authorized_keys", "config"]
-    private_keys = [
-        f
-        for f in all_files
-        if os.path.isfile(f)
-        and not f.endswith(".pub")
-        and os.path.basename(f) not in excluded_files
-        and not os.path.basename(f).startswith(".")
-    ]
+    scanner = scanner or KeyScanner()
+    private_keys = scanner.scan(Path.home() / ".ssh")
 
     # Common key naming patterns to prioritize
     common_patterns = ["id_rsa", "id_ed25519", "id_dsa", "id_ecdsa", "identity"]
 
     # Sort keys by putting common ones first
-    def key_sort(path):
-        basename = os.path.basename(path)
+    def key_sort(key: KeyInfo):
+        basename = os.path.basename(key.path)
         for i, pattern in enumerate(common_patterns):
             if pattern in basename:
                 return (0, i)  # Common patterns first, in order of commonness
@@ -282,13 +460,21 @@ def find_ssh_keys() -> List[str]:
     return sorted(private_keys, key=key_sort)
 
 
-def select_ssh_key() -> str:
+def find_ssh_keys(scanner: Optional[KeyScanner] = None) -> List[str]:
+    """
+    Find all SSH private keys in the user's .ssh directory.
+    Returns a list of full paths to SSH private key files.
+    """
+    return [key.path for key in scan_ssh_keys(scanner)]
+
+
+def select_ssh_key(scanner: Optional[KeyScanner] = None) -> str:
     """
     Allow user to select from available SSH keys or specify a custom path.
     Returns the full path to the selected SSH key.
     """
     # Find available SSH keys
-    available_keys = find_ssh_keys()
+    available_keys = scan_ssh_keys(scanner)
 
     if not available_keys:
         logger.warning("No SSH private keys found in ~/.ssh directory.")
@@ -301,9 +487,11 @@ def select_ssh_key() -> str:
 
     # Display available keys
     logger.info("\nAvailable SSH keys:")
-    for i, key_path in enumerate(available_keys, 1):
-        key_display = key_path.replace(os.path.expanduser("~"), "~")
-        logger.info("%d. %s", i, key_display)
+    for i, key in enumerate(available_keys, 1):
+        key_display = key.path.replace(os.path.expanduser("~"), "~")
+        kind = key.key_type or key.format
+        encrypted = ", encrypted" if key.encrypted else ""
+        logger.info("%d. %s (%s%s)", i, key_display, kind, encrypted)
 
     # Add option for custom path
     custom_option = len(available_keys) + 1
@@ -317,7 +505,7 @@ def select_ssh_key() -> str:
     try:
         choice = int(choice_text)
         if 1 <= choice <= len(available_keys):
-            selected_key = available_keys[choice - 1]
+            selected_key = available_keys[choice - 1].path
             logger.info("Selected SSH key: %s", selected_key)
             return selected_key
         elif choice == custom_option:
@@ -329,38 +517,524 @@ def select_ssh_key() -> str:
             )
         else:
             logger.warning("Invalid choice, using the first key.")
-            return available_keys[0]
+            return available_keys[0].path
     except ValueError:
         logger.warning("Invalid input, using the first key.")
-        return available_keys[0]
+        return available_keys[0].path
 
 
-# Direct script execution
-try:
-    if os.environ.get("SSH_KEY_PATH"):
-        SSH_KEY_PATH = os.environ.get("SSH_KEY_PATH")
-    else:
-        SSH_KEY_PATH = select_ssh_key()
+def merge_endpoint_hosts(
+    results: Iterable[Tuple[str, str, List[Tuple[str, Dict[str, Any]]]]],
+    renamed: Optional[Dict[str, Dict[str, str]]] = None,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Merge ``(endpoint name, project, hosts)`` results into one host list. Each
+    host records its endpoint and a project-qualified group; hostnames already
+    taken by an earlier endpoint are renamed ``hostname@endpoint``.
+
+    With ``renamed``, the renames are collected there as ``{endpoint:
+    {hostname: alias}}`` so the endpoint's SSH config can name the alias (an
+    ``Include`` of another endpoint would otherwise match the hostname first).
+    Without it, renamed hosts connect to the original name via ``ssh_hostname``.
+    """
+    merged: List[Tuple[str, Dict[str, Any]]] = []
+    seen: Set[str] = set()
+    for endpoint_name, project, hosts in results:
+        for hostname, data in hosts:
+            data["jinn_endpoint"] = endpoint_name
+            data["project_group"] = f"{project}/{data.get('group_name')}"
+            if hostname in seen:
+                alias = f"{hostname}@{endpoint_name}"
+                logger.warning(
+                    "Host %s exists in several endpoints, using %s", hostname, alias
+                )
+                if renamed is None:
+                    data["ssh_hostname"] = hostname
+                else:
+                    renamed.setdefault(endpoint_name, {})[hostname] = alias
+                hostname = alias
+            seen.add(hostname)
+            merged.append((hostname, data))
+    return merged
+
+
+def run_in_daemon_thread(fn: Callable[..., Any], *args: Any) -> Future:
+    """
+    Run ``fn(*args)`` in a daemon thread and return its future. Unlike
+    ``ThreadPoolExecutor`` workers, which are joined at interpreter exit, a
+    call that never returns can't keep the process alive.
+    """
+    future: Future = Future()
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def prefetch_ssh_keys() -> None:
+    """
+    Warm the ``SSHKeyManager`` key-list cache used by deploys, when it can log
+    in without prompting (``JINN_USERNAME``/``JINN_PASSWORD``).
+    """
+    try:
+        from infraninja.utils.pubkeys import SSHKeyManager
+    except ImportError:
+        return
+    if not SSHKeyManager.has_env_credentials():
+        return
+    try:
+        SSHKeyManager.get_instance().fetch_ssh_keys()
+    except Exception as e:
+        logger.warning("Could not prefetch SSH keys: %s", e)
+
+
+class JinnInventory:
+    """
+    Lazy Jinn inventory provider.
+
+    Creating an instance does no I/O: SSH key selection, API requests and SSH
+    config writes only happen the first time hosts are requested. Prompts are
+    only shown when running interactively and the value was not supplied via
+    the config or environment.
+    """
+
+    def __init__(
+        self,
+        config: Optional[NinjaConfig] = None,
+        ssh_key_path: Optional[str] = None,
+        selected_group: Optional[str] = None,
+        interactive: Optional[bool] = None,
+        write_ssh_config: bool = True,
+    ) -> None:
+        self.config = config or NinjaConfig.from_env()
+        self.selected_group = selected_group
+        self.interactive = sys.stdin.isatty() if interactive is None else interactive
+        self.write_ssh_config = write_ssh_config
+        self._ssh_key_path = ssh_key_path
+        self._key_resolver: Optional[KeyResolver] = None
+        self._key_scanner: Optional[KeyScanner] = None
+        self._hosts: Optional[List[Tuple[str, Dict[str, Any]]]] = None
+        self._project_name: Optional[str] = None
+        self._index: Optional[InventoryIndex] = None
+        self.delta: Optional[InventoryDelta] = None
+
+    def _require(self, value: Optional[str], prompt: str, env_var: str) -> str:
+        if value:
+            return value
+        if not self.interactive:
+            raise RuntimeError(f"{env_var} must be set for non-interactive use")
+        return input(prompt)
+
+    @property
+    def ssh_key_path(self) -> str:
+        """The SSH key stamped on every host, selected on first use."""
+        if self._ssh_key_path is None:
+            if os.environ.get("SSH_KEY_PATH") or not self.interactive:
+                self._ssh_key_path = str(self.config.ssh_key_path)
+            else:
+                self._ssh_key_path = select_ssh_key(self.key_scanner)
+        return self._ssh_key_path
+
+    @property
+    def key_resolver(self) -> KeyResolver:
+        """Per-host SSH key selection, from the key map and API hints."""
+        if self._key_resolver is None:
+            self._key_resolver = KeyResolver.from_file(
+                self.config.ssh_key_map, self.ssh_key_path, self.key_scanner
+            )
+        return self._key_resolver
+
+    @property
+    def key_scanner(self) -> KeyScanner:
+        """Private keys in ~/.ssh, cached between runs and indexed by fingerprint."""
+        if self._key_scanner is None:
+            self._key_scanner = KeyScanner(self.config.cache_dir / "ssh_keys.json")
+        return self._key_scanner
+
+    @property
+    def api_key(self) -> str:
+        self.config.api_key = self._require(
+            self.config.api_key, "Please enter your access key: ", "JINN_ACCESS_KEY"
+        )
+        return self.config.api_key
+
+    @property
+    def api_url(self) -> str:
+        self.config.api_url = self._require(
+            self.config.api_url, "Please enter the Jinn API base URL: ", "JINN_API_URL"
+        )
+        return self.config.api_url
+
+    def load(self) -> None:
+        """Fetch servers and set up the SSH config, once."""
+        if self._hosts is not None:
+            return
+
+        if self.config.endpoints:
+            self._load_endpoints(self.config.endpoints)
+        else:
+            self._load_single()
+        self._hosts = self._apply_shard(self._hosts)
+        if self.config.delta:
+            self._hosts = self._apply_delta(self._hosts)
+
+        if self.config.ssh_agent_preload:
+            preload_ssh_agent({data.get("ssh_key") for _, data in self._hosts} - {None})
+
+        if not self._hosts and self.delta is not None:
+            logger.info("No hosts changed since the last snapshot.")
+        elif not self._hosts:
+            logger.error("No valid hosts found. Check the API response and try again.")
+        else:
+            logger.info("\nSelected servers:")
+            for hostname, attrs in self._hosts:
+                logger.info("- %s (User: %s)", hostname, attrs["ssh_user"])
+
+    def _apply_shard(
+        self, hosts: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Keep only this runner's slice of the hosts when sharding is enabled."""
+        if not self.config.shard:
+            return hosts
+        index, count = parse_shard(self.config.shard)
+        sharded = list(filter_shard(hosts, index, count))
+        logger.info(
+            "Shard %d/%d: %d of %d hosts", index, count, len(sharded), len(hosts)
+        )
+        return sharded
+
+    @property
+    def snapshot(self) -> InventorySnapshot:
+        """Snapshot of the previous run for this API, selector and shard."""
+        endpoints = self.config.endpoints or [
+            JinnEndpoint("default", self.api_url, self.api_key)
+        ]
+        name = snapshot_name(
+            *(f"{endpoint.api_url}|{endpoint.api_key}" for endpoint in endpoints),
+            self.config.selector,
+            self.config.shard,
+            self.selected_group,
+        )
+        return InventorySnapshot(self.config.cache_dir / "snapshots" / name)
+
+    def _apply_delta(
+        self, hosts: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Keep only the hosts added or changed since the previous snapshot."""
+        self.delta = self.snapshot.diff(hosts)
+        logger.info("Inventory delta: %s", self.delta.summary())
+        for hostname in self.delta.removed:
+            logger.info("- %s removed since the last snapshot", hostname)
+
+        if self.config.delta_commit:
+            self.snapshot.save(hosts)
+        else:
+            # Staged on disk: pyinfra only runs the operations after the
+            # inventory and deploy code are done, often in another process
+            self.snapshot.save_pending(hosts)
+        return changed_hosts(hosts, self.delta)
+
+    def commit_snapshot(self) -> bool:
+        """
+        Make the host list staged by the last delta run the baseline for the
+        next one. Run after a successful deploy (``python -m
+        infraninja.inventory.jinn commit``), unless ``delta_commit`` already
+        saved it at load. Returns whether there was a staged list.
+        """
+        return self.snapshot.commit()
+
+    def _load_single(self) -> None:
+        ssh_key_path = self.ssh_key_path
+        auth_key, api_url = self.api_key, self.api_url
 
-    auth_key = config.api_key or input("Please enter your access key: ")
-    api_url = config.api_url or input("Please enter the Jinn API base URL: ")
+        # The SSH config and key list don't depend on the server list, so fetch
+        # them in the background while servers stream (and prompts are shown)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            ssh_config_future = None
+            if self.write_ssh_config:
+                ssh_config_future = pool.submit(
+                    fetch_ssh_config, auth_key, api_url, True, self.config
+                )
+            keys_future = pool.submit(prefetch_ssh_keys)
 
-    server_list, project_name = fetch_servers(auth_key, api_url)
+            self._hosts, self._project_name = fetch_servers(
+                auth_key,
+                api_url,
+                selected_group=self.selected_group,
+                ssh_key_path=ssh_key_path,
+                config=self.config,
+                interactive=self.interactive,
+                selector=self.config.selector,
+                key_resolver=self.key_resolver,
+            )
+
+            if ssh_config_future is not None:
+                self.setup_ssh_config(ssh_config_future.result())
+            keys_future.result()
+
+    def _endpoint_selector(self) -> str:
+        """
+        The selector applied to every endpoint: ``JINN_SELECTOR`` and the
+        selected group. Group and tag numbers (``JINN_GROUPS``, ``JINN_TAGS``,
+        the prompts) index one endpoint's lists, so they can't apply here.
+        """
+        terms = []
+        if self.config.selector:
+            terms.append(f"({self.config.selector})")
+        if self.selected_group:
+            terms.append(f'group:"{self.selected_group}"')
+        ignored = [
+            name for name in ("JINN_GROUPS", "JINN_TAGS") if os.environ.get(name)
+        ]
+        if ignored:
+            logger.warning(
+                "%s ignored with JINN_ENDPOINTS, use JINN_SELECTOR instead",
+                " and ".join(ignored),
+            )
+        if not terms:
+            logger.info("No JINN_SELECTOR set, selecting every host of every endpoint")
+        return " & ".join(terms) or "*"
+
+    def _fetch_endpoint(
+        self, endpoint: JinnEndpoint, ssh_key_path: str, selector: str
+    ) -> Tuple[str, List[Tuple[str, Dict[str, Any]]], Optional[str]]:
+        hosts, project = fetch_servers(
+            endpoint.api_key,
+            endpoint.api_url,
+            ssh_key_path=ssh_key_path,
+            config=self.config,
+            interactive=False,
+            selector=selector,
+            key_resolver=self.key_resolver,
+            raise_errors=True,
+        )
+        ssh_config_content = None
+        if self.write_ssh_config:
+            ssh_config_content = fetch_ssh_config(
+                endpoint.api_key, endpoint.api_url, True, self.config
+            )
+        return project, hosts, ssh_config_content
+
+    def _load_endpoints(self, endpoints: List[JinnEndpoint]) -> None:
+        """
+        Fetch several endpoints in parallel and merge them. Endpoints that fail
+        or don't answer within ``endpoint_timeout`` are skipped so one slow
+        region can't hold up the rest: fetches run in daemon threads, so a
+        hung one is abandoned rather than waited for at exit, and nothing it
+        returns late is used.
+        """
+        ssh_key_path = self.ssh_key_path
+        selector = self._endpoint_selector()
+        futures = [
+            run_in_daemon_thread(self._fetch_endpoint, endpoint, ssh_key_path, selector)
+            for endpoint in endpoints
+        ]
+        run_in_daemon_thread(prefetch_ssh_keys)
+        done, not_done = wait(futures, timeout=self.config.endpoint_timeout)
+        for future in not_done:
+            future.cancel()
 
-    config_content = fetch_ssh_config(auth_key, api_url, bastionless=True)
-    if config_content:
-        default_config_name = f"{project_name}_ssh_config"
-        config_filename = get_valid_filename(default_config_name)
-        save_ssh_config(config_content, config_filename)
-        update_main_ssh_config()
+        results = []
+        ssh_configs = []
+        for endpoint, future in zip(endpoints, futures):
+            if future not in done:
+                logger.warning(
+                    "Skipping endpoint %s: no answer within %ss",
+                    endpoint.name,
+                    self.config.endpoint_timeout,
+                )
+                continue
+            try:
+                project, hosts, ssh_config_content = future.result()
+            except Exception as e:
+                logger.warning("Skipping endpoint %s: %s", endpoint.name, e)
+                continue
+            results.append((endpoint.name, project, hosts))
+            if ssh_config_content:
+                ssh_configs.append((endpoint.name, project, ssh_config_content))
+
+        renamed: Optional[Dict[str, Dict[str, str]]] = (
+            {} if self.write_ssh_config else None
+        )
+        self._hosts = merge_endpoint_hosts(results, renamed)
+        for name, project, content in ssh_configs:
+            hosts = [host for host in self._hosts if host[1]["jinn_endpoint"] == name]
+            save_ssh_config(
+                rename_hosts(content, renamed.get(name, {})),
+                f"{project}_{name}_ssh_config",
+                config=self.config,
+                identity_file=ssh_key_path,
+                identity_files=self._identity_files(hosts),
+            )
+        if self.write_ssh_config and results:
+            update_main_ssh_config(config=self.config)
+        self._project_name = ",".join(sorted({project for _, project, _ in results}))
+
+    def _identity_files(
+        self, hosts: List[Tuple[str, Dict[str, Any]]]
+    ) -> Optional[Dict[str, str]]:
+        """
+        The key of each host for the SSH config when keys differ per host (a
+        key map is set), or None to pin every host to the default key.
+        """
+        if self.config.ssh_key_map is None and not any(
+            data.get("ssh_key") != self.ssh_key_path for _, data in hosts
+        ):
+            return None
+        return {name: data["ssh_key"] for name, data in hosts if data.get("ssh_key")}
+
+    def setup_ssh_config(self, config_content: Optional[str] = None) -> None:
+        """Save the project SSH config and include it from ~/.ssh/config."""
+        if config_content is None:
+            config_content = fetch_ssh_config(
+                self.api_key, self.api_url, bastionless=True, config=self.config
+            )
+        if not config_content:
+            return
+
+        default_config_name = f"{self.project_name}_ssh_config"
+        if self.config.ssh_config_filename:
+            config_filename = os.path.basename(self.config.ssh_config_filename)
+        elif self.interactive:
+            config_filename = get_valid_filename(default_config_name)
+        else:
+            config_filename = default_config_name
+        save_ssh_config(
+            config_content,
+            config_filename,
+            config=self.config,
+            identity_file=self.ssh_key_path,
+            identity_files=self._identity_files(self._hosts or []),
+        )
+        update_main_ssh_config(config=self.config)
         logger.info("SSH configuration setup is complete.")
 
-    if not server_list:
-        logger.error("No valid hosts found. Check the API response and try again.")
+    @property
+    def hosts(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Selected hosts as pyinfra ``(hostname, data)`` tuples."""
+        self.load()
+        return self._hosts
+
+    @property
+    def project_name(self) -> str:
+        self.load()
+        return self._project_name
+
+    @property
+    def index(self) -> InventoryIndex:
+        """
+        Inverted group/tag/project/attribute index over all active servers,
+        built on first use for repeated selection within one session. Hosts
+        of several endpoints are merged as in ``load()``.
+        """
+        if self._index is None:
+            endpoints = self.config.endpoints or [
+                JinnEndpoint("default", self.api_url, self.api_key)
+            ]
+            results = []
+            terms: List[Set[str]] = []
+            for endpoint in endpoints:
+                catalog: Dict[str, Any] = {}
+                hosts = []
+                servers = track_project(self._iter_endpoint_servers(endpoint), catalog)
+                for server in servers:
+                    if server.get("is_active", False):
+                        hosts.append(build_host(server, key_resolver=self.key_resolver))
+                        terms.append(server_terms(server))
+                results.append((endpoint.name, catalog["project"], hosts))
+
+            # Same aliases as load(), named in the endpoint SSH configs it saves
+            renamed = {} if self.write_ssh_config else None
+            self._index = InventoryIndex()
+            merged = merge_endpoint_hosts(results, renamed)
+            for host, host_terms in zip(merged, terms):
+                self._index.add(host, host_terms)
+        return self._index
+
+    def _iter_endpoint_servers(self, endpoint: JinnEndpoint) -> Iterator[Dict]:
+        try:
+            yield from iter_servers(endpoint.api_key, endpoint.api_url, self.config)
+        except requests.exceptions.RequestException as e:
+            logger.warning("Skipping endpoint %s: %s", endpoint.name, e)
+
+    def select(self, selector: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Return the hosts matching a selector expression, such as
+        ``group:web & (tag:prod | tag:canary) & !tag:drain``.
+        """
+        return self._apply_shard(self.index.select(selector))
+
+    def groups(
+        self,
+    ) -> Dict[str, Tuple[List[Tuple[str, Dict[str, Any]]], Dict[str, Any]]]:
+        """
+        Selected hosts keyed by their Jinn group, as pyinfra ``(hosts, data)``
+        inventory groups. Shared defaults become group data, so pyinfra
+        resolves them per group instead of storing them on every host.
+        """
+        groups: Dict[str, Tuple[List[Tuple[str, Dict[str, Any]]], Dict[str, Any]]] = {}
+        for hostname, data in self.hosts:
+            group = data.get("project_group") or data.get("group_name") or "ungrouped"
+            if isinstance(data, HostRecord):
+                hosts, group_data = groups.setdefault(group, ([], data.defaults))
+                hosts.append((hostname, data.own_data(group_data)))
+            else:
+                groups.setdefault(group, ([], {}))[0].append((hostname, data))
+        return groups
+
+
+_provider: Optional[JinnInventory] = None
+
+
+def get_provider() -> JinnInventory:
+    """Return the shared, lazily-created inventory provider."""
+    global _provider
+    if _provider is None:
+        _provider = JinnInventory()
+    return _provider
+
+
+def get_hosts() -> Dict[str, Tuple[List[Tuple[str, Dict[str, Any]]], Dict[str, Any]]]:
+    """
+    pyinfra inventory function, e.g.:
+
+        pyinfra infraninja.inventory.jinn.get_hosts deploy.py
+    """
+    return get_provider().groups()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """``python -m infraninja.inventory.jinn commit``, run after ``pyinfra``."""
+    parser = argparse.ArgumentParser(prog="python -m infraninja.inventory.jinn")
+    parser.add_argument(
+        "command",
+        choices=["commit"],
+        help="commit: make the hosts of the last JINN_DELTA run the baseline "
+        "for the next one, once the deploy has succeeded",
+    )
+    parser.parse_args(argv)
+    if get_provider().commit_snapshot():
+        logger.info("Inventory snapshot committed.")
     else:
-        logger.info("\nSelected servers:")
-        for hostname, attrs in server_list:
-            logger.info("- %s (User: %s)", hostname, attrs["ssh_user"])
+        logger.info("No pending inventory snapshot to commit.")
+    return 0
+
+
+if __name__ == "__main__" and globals().get("__spec__") is not None:
+    sys.exit(main())
 
-except Exception as e:
-    logger.error("An error occurred: %s", str(e))
+# Executed as a file (``pyinfra infraninja/inventory/jinn.py`` or ``python jinn.py``)
+# rather than imported: expose the selected hosts as module-level inventory lists.
+if globals().get("__spec__") is None:
+    try:
+        server_list = get_provider().hosts
+        project_name = get_provider().project_name
+    except Exception as e:
+        logger.error("An error occurred: %s", str(e))
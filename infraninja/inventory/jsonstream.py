@@ -0,0 +1,126 @@
+# inventory || jsonstream.py
+
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class _Buffer:
+    """Text buffer fed lazily from an iterable of str/bytes chunks."""
+
+    def __init__(self, chunks: Iterable[Union[str, bytes]]) -> None:
+        self._chunks = iter(chunks)
+        self._decode = codecs.getincrementaldecoder("utf-8")().decode
+        self.text = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def fill(self) -> bool:
+        """Read one more chunk; return False once the source is exhausted."""
+        if self.exhausted:
+            return False
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._decode(chunk)
+            if chunk:
+                # Drop consumed text so the buffer never holds more than one item
+                self.text = self.text[self.pos :] + chunk
+                self.pos = 0
+                return True
+        self.exhausted = True
+        return False
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON document")
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(
+                f"Expected '{char}' at offset {self.pos}, got '{self.text[self.pos]}'"
+            )
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode one complete JSON value from the buffer."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number or literal touching the end of the buffer may be truncated
+            if end == len(self.text) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_items(
+    chunks: Iterable[Union[str, bytes]],
+    key: str = "result",
+    meta: Optional[Dict[str, Any]] = None,
+) -> Iterator[Any]:
+    """
+    Incrementally yield the items of the array stored under ``key`` in a JSON
+    object, without ever holding the whole document in memory.
+
+    Any other top-level keys (e.g. pagination links) are decoded normally and
+    stored in ``meta`` once the document has been consumed. A bare top-level
+    array is streamed as well.
+    """
+    buf = _Buffer(chunks)
+    yield from _iter_document(buf, key, meta if meta is not None else {})
+    # Exhaust the source so that wrapping generators (e.g. caches) complete
+    while buf.fill():
+        pass
+
+
+def _iter_document(buf: _Buffer, key: str, meta: Dict[str, Any]) -> Iterator[Any]:
+    if buf.peek() == "[":
+        yield from _iter_array(buf)
+        return
+
+    buf.expect("{")
+    if buf.peek() == "}":
+        buf.pos += 1
+        return
+
+    while True:
+        name = buf.value()
+        buf.expect(":")
+        if name == key and buf.peek() == "[":
+            yield from _iter_array(buf)
+        else:
+            meta[name] = buf.value()
+
+        if buf.peek() == ",":
+            buf.pos += 1
+            continue
+        buf.expect("}")
+        return
+
+
+def _iter_array(buf: _Buffer) -> Iterator[Any]:
+    buf.expect("[")
+    if buf.peek() == "]":
+        buf.pos += 1
+        return
+    while True:
+        yield buf.value()
+        if buf.peek() == ",":
+            buf.pos += 1
+            continue
+        buf.expect("]")
+        return
@@ -0,0 +1,199 @@
+# inventory || selector.py
+
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
+# Selector grammar, loosest binding first:
+#   expr   := and ("|" and)*
+#   and    := not ("&" not)*
+#   not    := "!" not | "(" expr ")" | "*" | term
+#   term   := kind ":" value          e.g. group:web, tag:"blue green"
+#                                      attr:role=db, project:acme, host:web-1
+_TOKEN_RE = re.compile(
+    r"""\s*(?:
+        (?P<op>[&|!()*])
+        |(?P<term>[A-Za-z_]+:(?:"[^"]*"|[^\s&|!()]+))
+    )""",
+    re.VERBOSE,
+)
+
+Expression = Tuple[Any, ...]
+HostTuple = Tuple[str, Dict[str, Any]]
+
+
+def _tokenize(selector: str) -> List[str]:
+    tokens = []
+    pos = 0
+    selector = selector.strip()
+    while pos < len(selector):
+        match = _TOKEN_RE.match(selector, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Invalid selector near: {selector[pos:]!r}")
+        token = match.group("op") or match.group("term")
+        kind, _, value = token.partition(":")
+        if value.startswith('"'):
+            token = f"{kind}:{value[1:-1]}"
+        tokens.append(token)
+        pos = match.end()
+        while pos < len(selector) and selector[pos].isspace():
+            pos += 1
+    return tokens
+
+
+def parse_selector(selector: str) -> Expression:
+    """
+    Parse a selector such as ``group:web & (tag:prod | tag:canary) & !tag:drain``
+    into an expression tree usable by ``matches`` and ``InventoryIndex.select``.
+    """
+    tokens = _tokenize(selector)
+    if not tokens:
+        raise ValueError("Empty selector")
+    pos = 0
+
+    def peek() -> str:
+        return tokens[pos] if pos < len(tokens) else ""
+
+    def take(expected: str = "") -> str:
+        nonlocal pos
+        token = peek()
+        if not token or (expected and token != expected):
+            raise ValueError(
+                f"Invalid selector {selector!r}: expected {expected or 'term'}"
+            )
+        pos += 1
+        return token
+
+    def parse_or() -> Expression:
+        node = parse_and()
+        while peek() == "|":
+            take("|")
+            node = ("or", node, parse_and())
+        return node
+
+    def parse_and() -> Expression:
+        node = parse_not()
+        while peek() == "&":
+            take("&")
+            node = ("and", node, parse_not())
+        return node
+
+    def parse_not() -> Expression:
+        token = take()
+        if token == "!":
+            return ("not", parse_not())
+        if token == "(":
+            node = parse_or()
+            take(")")
+            return node
+        if token == "*":
+            return ("all",)
+        if token in "&|)":
+            raise ValueError(f"Invalid selector {selector!r}: unexpected {token!r}")
+        return ("term", token)
+
+    expression = parse_or()
+    if pos != len(tokens):
+        raise ValueError(f"Invalid selector {selector!r}: unexpected {tokens[pos]!r}")
+    return expression
+
+
+def server_terms(server: Dict[str, Any]) -> Set[str]:
+    """Return the selector terms a server record from the API is indexed under."""
+    group = server.get("group", {}) or {}
+    project = group.get("project", {}) or {}
+    terms = {f"host:{server.get('hostname')}"}
+    if group.get("name_en"):
+        terms.add(f"group:{group['name_en']}")
+    if project.get("name_en"):
+        terms.add(f"project:{project['name_en']}")
+    terms.update(f"tag:{tag}" for tag in server.get("tags", []) if tag)
+    for key, value in (server.get("attributes") or {}).items():
+        if isinstance(value, (str, int, float, bool)):
+            terms.add(f"attr:{key}={value}")
+    return terms
+
+
+def matches(expression: Expression, terms: Set[str]) -> bool:
+    """Evaluate an expression against the terms of a single server."""
+    op = expression[0]
+    if op == "term":
+        return expression[1] in terms
+    if op == "not":
+        return not matches(expression[1], terms)
+    if op == "and":
+        return matches(expression[1], terms) and matches(expression[2], terms)
+    if op == "or":
+        return matches(expression[1], terms) or matches(expression[2], terms)
+    return True
+
+
+def filter_servers(
+    servers: Iterable[Dict[str, Any]], selector: str
+) -> Iterator[Dict[str, Any]]:
+    """Lazily yield the active servers matching a selector."""
+    expression = parse_selector(selector)
+    for server in servers:
+        if server.get("is_active", False) and matches(expression, server_terms(server)):
+            yield server
+
+
+class InventoryIndex:
+    """
+    Inverted index from selector terms (group, tag, project, attribute and
+    host) to host IDs, so a fleet can be re-selected repeatedly with plain
+    set operations instead of rescanning every server.
+    """
+
+    def __init__(self) -> None:
+        self._hosts: Dict[str, HostTuple] = {}
+        self._postings: Dict[str, Set[str]] = {}
+
+    @classmethod
+    def from_servers(
+        cls,
+        servers: Iterable[Dict[str, Any]],
+        build_host: Callable[[Dict[str, Any]], HostTuple],
+    ) -> "InventoryIndex":
+        """Index the active servers, storing the host tuple built for each."""
+        index = cls()
+        for server in servers:
+            if server.get("is_active", False):
+                index.add(build_host(server), server_terms(server))
+        return index
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
+    def add(self, host: HostTuple, terms: Iterable[str]) -> None:
+        host_id = host[0]
+        self._hosts[host_id] = host
+        for term in terms:
+            self._postings.setdefault(term, set()).add(host_id)
+
+    def terms(self, kind: str) -> List[str]:
+        """Return the sorted values indexed for a term kind, e.g. ``tag``."""
+        prefix = f"{kind}:"
+        return sorted(
+            term[len(prefix) :] for term in self._postings if term.startswith(prefix)
+        )
+
+    def _evaluate(self, expression: Expression) -> Set[str]:
+        op = expression[0]
+        if op == "term":
+            return self._postings.get(expression[1], set())
+        if op == "not":
+            return self._hosts.keys() - self._evaluate(expression[1])
+        if op == "and":
+            return self._evaluate(expression[1]) & self._evaluate(expression[2])
+        if op == "or":
+            return self._evaluate(expression[1]) | self._evaluate(expression[2])
+        return set(self._hosts)
+
+    def select_ids(self, selector: str) -> Set[str]:
+        """Return the IDs of the hosts matching a selector."""
+        return set(self._evaluate(parse_selector(selector)))
+
+    def select(self, selector: str) -> List[HostTuple]:
+        """Return the host tuples matching a selector, in index order."""
+        host_ids = self.select_ids(selector)
+        return [host for host_id, host in self._hosts.items() if host_id in host_ids]
@@ -0,0 +1,41 @@
+# inventory || sharding.py
+
+import hashlib
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+HostTuple = Tuple[str, Dict[str, Any]]
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Parse a shard spec ``i/N`` (1-based, e.g. ``2/4``) into ``(index, count)``.
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {value!r}, expected i/N such as 2/4")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {value!r}, index must be within 1..N")
+    return index, count
+
+
+def shard_of(hostname: str, count: int) -> int:
+    """
+    Return the 1-based shard owning a hostname, using rendezvous (highest
+    random weight) hashing. Ownership depends only on the hostname and the
+    number of shards, so adding or removing hosts never moves other hosts,
+    and changing N only moves the hosts the new/removed shard takes over.
+    """
+    return max(
+        range(1, count + 1),
+        key=lambda shard: hashlib.sha1(f"{shard}:{hostname}".encode()).digest(),
+    )
+
+
+def filter_shard(
+    hosts: Iterable[HostTuple], index: int, count: int
+) -> Iterator[HostTuple]:
+    """Lazily yield the hosts belonging to shard ``index`` of ``count``."""
+    for host in hosts:
+        if count == 1 or shard_of(host[0], count) == index:
+            yield host
@@ -0,0 +1,150 @@
+# inventory || snapshot.py
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+HostTuple = Tuple[str, Dict[str, Any]]
+
+# Controller-side host data that says nothing about the server itself
+IGNORED_KEYS = frozenset({"ssh_key"})
+
+
+@dataclass
+class InventoryDelta:
+    """Hosts added, removed and changed since the previous snapshot."""
+
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: Dict[str, List[str]] = field(default_factory=dict)  # host -> keys
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.changed)} changed, "
+            f"{len(self.removed)} removed"
+        )
+
+
+def _comparable(data: Dict[str, Any]) -> Dict[str, Any]:
+    # Tuples (e.g. shared tag tuples) are compared as the lists JSON stores
+    return {
+        key: list(value) if isinstance(value, tuple) else value
+        for key, value in data.items()
+        if key not in IGNORED_KEYS
+    }
+
+
+def diff_hosts(
+    previous: Dict[str, Dict[str, Any]], hosts: Iterable[HostTuple]
+) -> InventoryDelta:
+    """Compare host tuples with a previous ``{hostname: data}`` snapshot."""
+    delta = InventoryDelta()
+    seen = set()
+    for hostname, data in hosts:
+        seen.add(hostname)
+        if hostname not in previous:
+            delta.added.append(hostname)
+            continue
+        old, new = previous[hostname], _comparable(data)
+        changed_keys = sorted(
+            key for key in old.keys() | new.keys() if old.get(key) != new.get(key)
+        )
+        if changed_keys:
+            delta.changed[hostname] = changed_keys
+    delta.removed = sorted(set(previous) - seen)
+    return delta
+
+
+class InventorySnapshot:
+    """
+    The host list and data of a previous run, persisted as JSON. A new
+    baseline can be staged as a pending file and committed later, e.g. by
+    another process once the deploy has succeeded.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.pending_path = self.path.with_suffix(".pending.json")
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Return the previous ``{hostname: data}``, empty if there is none."""
+        try:
+            with open(self.path, "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(
+                "Ignoring unreadable inventory snapshot %s: %s", self.path, e
+            )
+            return {}
+
+    @staticmethod
+    def _write(path: Path, hosts: Iterable[HostTuple]) -> None:
+        snapshot = {hostname: _comparable(data) for hostname, data in hosts}
+        with atomic_write(path) as file:
+            json.dump(snapshot, file, default=str, sort_keys=True)
+
+    def save(self, hosts: Iterable[HostTuple]) -> None:
+        """Atomically replace the snapshot with the given hosts."""
+        self._write(self.path, hosts)
+        self.discard_pending()
+
+    def save_pending(self, hosts: Iterable[HostTuple]) -> None:
+        """Stage the given hosts as the next snapshot, until ``commit()``."""
+        self._write(self.pending_path, hosts)
+
+    def commit(self) -> bool:
+        """Make the pending snapshot current. Returns whether there was one."""
+        try:
+            os.replace(self.pending_path, self.path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def discard_pending(self) -> None:
+        try:
+            os.unlink(self.pending_path)
+        except FileNotFoundError:
+            pass
+
+    def diff(self, hosts: Iterable[HostTuple]) -> InventoryDelta:
+        return diff_hosts(self.load(), hosts)
+
+
+def changed_hosts(hosts: Iterable[HostTuple], delta: InventoryDelta) -> List[HostTuple]:
+    """
+    Return only the added and changed hosts, annotated with ``jinn_delta``
+    (``added``/``changed``) and, for changed hosts, ``jinn_changed_keys``.
+    The annotations are set on the host data itself, so compact host records
+    keep sharing their defaults.
+    """
+    added = set(delta.added)
+    selected = []
+    for hostname, data in hosts:
+        if hostname in added:
+            data["jinn_delta"] = "added"
+        elif hostname in delta.changed:
+            data["jinn_delta"] = "changed"
+            data["jinn_changed_keys"] = delta.changed[hostname]
+        else:
+            continue
+        selected.append((hostname, data))
+    return selected
+
+
+def snapshot_name(*parts: Optional[str]) -> str:
+    """Build a stable snapshot filename from what scopes the selection."""
+    digest = hashlib.sha256("\0".join(part or "" for part in parts).encode())
+    return f"{digest.hexdigest()[:16]}.json"
@@ -0,0 +1,311 @@
+# inventory || sshconfig.py
+
+import hashlib
+import os
+import re
+import shlex
+import stat
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .files import atomic_write
+
+_LINE_RE = re.compile(r"^(\s*)([A-Za-z]+)(?:\s*=\s*|\s+)(.*?)\s*$")
+
+
+@dataclass
+class _Block:
+    keyword: str  # "host" or "match"; "" for the options before the first block
+    patterns: List[str]
+    start: int  # index of the Host/Match line
+    end: int  # index after the last option line
+    options: Dict[str, int] = field(default_factory=dict)  # option -> line index
+    indent: str = "    "
+
+    @property
+    def is_concrete_host(self) -> bool:
+        """A Host block naming at least one real host (not only wildcards)."""
+        return self.keyword == "host" and any(
+            not pattern.startswith("!") and not set(pattern) & set("*?")
+            for pattern in self.patterns
+        )
+
+
+def parse_blocks(lines: List[str]) -> List[_Block]:
+    """Split ssh_config lines into the global section and Host/Match blocks."""
+    blocks = [_Block("", [], 0, 0)]
+    for i, line in enumerate(lines):
+        match = _LINE_RE.match(line)
+        if not match or line.lstrip().startswith("#"):
+            continue
+        indent, key, value = match.groups()
+        key = key.lower()
+        if key in ("host", "match"):
+            blocks.append(_Block(key, value.split(), i, i + 1))
+            continue
+        block = blocks[-1]
+        block.options.setdefault(key, i)
+        block.end = i + 1
+        if indent:
+            block.indent = indent
+    return blocks
+
+
+def split_jump_host(jump: str) -> Tuple[Optional[str], str, Optional[str]]:
+    """Split a ProxyJump hop ``[user@]host[:port]`` into its parts."""
+    user, _, hostport = jump.rpartition("@")
+    host, port = hostport, None
+    if hostport.count(":") == 1:
+        host, port = hostport.split(":")
+    return user or None, host, port
+
+
+def proxy_command(hops: str) -> str:
+    """
+    Translate a ProxyJump value into an equivalent ``ssh -W`` ProxyCommand.
+    pyinfra (paramiko) opens a fresh connection to the jump host for every
+    target, while OpenSSH reuses the jump host's ControlMaster connection.
+    """
+    *earlier, last = [hop.strip() for hop in hops.split(",")]
+    user, host, port = split_jump_host(last)
+    command = ["ssh", "-W", "%h:%p"]
+    if earlier:
+        command += ["-J", ",".join(earlier)]
+    if user:
+        command += ["-l", user]
+    if port:
+        command += ["-p", port]
+    return " ".join(command + [shlex.quote(host)])
+
+
+def multiplex_options(
+    control_dir: str,
+    control_persist: str = "10m",
+    keepalive: int = 30,
+    identity_file: Optional[str] = None,
+) -> List[Tuple[str, str]]:
+    """The options added to every generated host and jump host."""
+    options = [
+        ("ControlMaster", "auto"),
+        # %C is a hash of the connection, keeping socket paths short and unique
+        ("ControlPath", f"{control_dir.rstrip('/')}/%C"),
+        ("ControlPersist", control_persist),
+        ("ServerAliveInterval", str(keepalive)),
+        ("ServerAliveCountMax", "3"),
+    ]
+    if identity_file:
+        options += [("IdentitiesOnly", "yes"), ("IdentityFile", identity_file)]
+    return options
+
+
+def augment_ssh_config(
+    content: str,
+    control_dir: str,
+    control_persist: str = "10m",
+    keepalive: int = 30,
+    identity_file: Optional[str] = None,
+    identity_files: Optional[Dict[str, str]] = None,
+) -> str:
+    """
+    Add connection reuse to a generated SSH config.
+
+    Every concrete ``Host`` block gets ControlMaster/ControlPath/
+    ControlPersist, keep-alives and IdentitiesOnly for its key: the key of
+    its first pattern in ``identity_files`` (host name -> key) if given,
+    else ``identity_file``. With ``identity_files``, hosts missing from it get
+    no key options, so ssh still offers every key it knows for them.
+    Options the config already sets are left alone. ``ProxyJump``
+    hops become ``ssh -W`` ProxyCommands, so all hosts behind a bastion share
+    one multiplexed master connection to it; bastions without a block of
+    their own get one.
+    """
+    lines = content.splitlines()
+    blocks = parse_blocks(lines)
+    keys = {host.lower(): key for host, key in (identity_files or {}).items()}
+
+    def options_for(patterns: List[str]) -> List[Tuple[str, str]]:
+        if identity_files is None:
+            key = identity_file
+        else:
+            key = next((keys[p.lower()] for p in patterns if p.lower() in keys), None)
+        return multiplex_options(control_dir, control_persist, keepalive, key)
+
+    # line index -> replacement line, and line index -> lines inserted after it
+    replace: Dict[int, str] = {}
+    insert: Dict[int, List[str]] = {}
+    known_hosts = {
+        pattern.lower()
+        for block in blocks
+        if block.keyword == "host"
+        for pattern in block.patterns
+    }
+    jump_hosts: Dict[str, Tuple[Optional[str], str, Optional[str]]] = {}
+
+    for block in blocks:
+        if not block.is_concrete_host:
+            continue
+        added = [
+            f"{block.indent}{key} {value}"
+            for key, value in options_for(block.patterns)
+            if key.lower() not in block.options
+        ]
+        if "proxyjump" in block.options and "proxycommand" not in block.options:
+            index = block.options["proxyjump"]
+            hops = _LINE_RE.match(lines[index]).group(3)
+            if hops.lower() != "none":
+                replace[index] = f"{block.indent}ProxyCommand {proxy_command(hops)}"
+                for hop in hops.split(","):
+                    user, host, port = split_jump_host(hop.strip())
+                    jump_hosts.setdefault(host.lower(), (user, host, port))
+        if added:
+            insert.setdefault(block.end - 1, []).extend(added)
+
+    output = []
+    for i, line in enumerate(lines):
+        output.append(replace.get(i, line))
+        output.extend(insert.get(i, []))
+
+    for name, (user, host, port) in sorted(jump_hosts.items()):
+        if name in known_hosts:
+            continue
+        output += ["", f"Host {host}"]
+        if user:
+            output.append(f"    User {user}")
+        if port:
+            output.append(f"    Port {port}")
+        output += [f"    {key} {value}" for key, value in options_for([host])]
+
+    return "\n".join(output) + "\n"
+
+
+def rename_hosts(content: str, renames: Dict[str, str]) -> str:
+    """
+    Rename ``Host`` patterns per ``renames`` (host name -> alias). A renamed
+    block without a ``HostName`` gets one with the original name, so the
+    alias still connects to the same machine.
+    """
+    if not renames:
+        return content
+    wanted = {host.lower(): alias for host, alias in renames.items()}
+    lines = content.splitlines()
+    for block in reversed(parse_blocks(lines)):
+        if block.keyword != "host":
+            continue
+        renamed = [wanted.get(pattern.lower(), pattern) for pattern in block.patterns]
+        if renamed == block.patterns:
+            continue
+        indent = _LINE_RE.match(lines[block.start]).group(1)
+        lines[block.start] = f"{indent}Host {' '.join(renamed)}"
+        if "hostname" not in block.options:
+            original = next(
+                pattern
+                for pattern, new in zip(block.patterns, renamed)
+                if pattern != new
+            )
+            lines.insert(block.start + 1, f"{block.indent}HostName {original}")
+    return "\n".join(lines) + "\n"
+
+
+def _include_patterns(value: str) -> List[str]:
+    try:
+        return shlex.split(value)
+    except ValueError:
+        return value.split()
+
+
+def _resolve_include(pattern: str, ssh_dir: str) -> str:
+    # ssh resolves relative Include paths against ~/.ssh
+    path = os.path.expanduser(pattern)
+    if not os.path.isabs(path):
+        path = os.path.join(ssh_dir, path)
+    return os.path.normpath(path)
+
+
+def has_include(content: str, include: str, ssh_dir: str) -> bool:
+    """
+    Whether ``content`` includes ``include`` unconditionally, i.e. from an
+    ``Include`` line before any Host/Match block (an Include inside a block
+    only applies when that block matches). Paths are compared after ``~`` and
+    relative path resolution, and a line may list several patterns.
+    """
+    wanted = _resolve_include(include, ssh_dir)
+    for line in content.splitlines():
+        match = _LINE_RE.match(line)
+        if not match or line.lstrip().startswith("#"):
+            continue
+        key, value = match.group(2).lower(), match.group(3)
+        if key in ("host", "match"):
+            return False
+        if key == "include" and any(
+            _resolve_include(pattern, ssh_dir) == wanted
+            for pattern in _include_patterns(value)
+        ):
+            return True
+    return False
+
+
+def remove_block_includes(content: str, include: str, ssh_dir: str) -> str:
+    """
+    Drop ``Include`` lines naming only ``include`` that sit inside a Host/Match
+    block, such as the one older versions appended at the end of the file
+    (where it only applied when the last block matched).
+    """
+    wanted = _resolve_include(include, ssh_dir)
+    lines = content.splitlines()
+    kept: List[str] = []
+    in_block = False
+    for line in lines:
+        match = _LINE_RE.match(line)
+        if match and not line.lstrip().startswith("#"):
+            key, value = match.group(2).lower(), match.group(3)
+            if key in ("host", "match"):
+                in_block = True
+            elif (
+                in_block
+                and key == "include"
+                and [_resolve_include(p, ssh_dir) for p in _include_patterns(value)]
+                == [wanted]
+            ):
+                continue
+        kept.append(line)
+    if len(kept) == len(lines):
+        return content
+    return "\n".join(kept).rstrip("\n") + "\n"
+
+
+def add_include(content: str, include: str) -> str:
+    """Insert an ``Include`` line before the first Host/Match block."""
+    lines = content.splitlines()
+    for i, line in enumerate(lines):
+        match = _LINE_RE.match(line)
+        if match and match.group(2).lower() in ("host", "match"):
+            lines[i:i] = [f"Include {include}", ""]
+            break
+    else:
+        if lines and lines[-1].strip():
+            lines.append("")
+        lines.append(f"Include {include}")
+    return "\n".join(lines) + "\n"
+
+
+def write_if_changed(path: str, content: str, mode: int = 0o600) -> bool:
+    """
+    Atomically replace ``path`` with ``content`` unless its content hash is
+    already the same. Writes go to a temporary file in the same directory that
+    is renamed over the target, so concurrent readers (and runs) never see a
+    partial file. Symlinks are followed and an existing file keeps its mode.
+    Returns whether the file was written.
+    """
+    path = os.path.realpath(path)
+    data = content.encode()
+    try:
+        with open(path, "rb") as file:
+            if hashlib.sha256(file.read()).digest() == hashlib.sha256(data).digest():
+                return False
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        pass
+
+    with atomic_write(path, "wb", chmod=mode) as file:
+        file.write(data)
+    return True
@@ -4,6 +4,8 @@ from pyinfra.operations import files, openrc
 from pyinfra import host
 from pyinfra.facts.files import Directory, File
 
+from infraninja.utils.fact_cache import cached_fact, invalidate_facts
+
 
 @deploy("Fix and configure Fail2Ban on Alpine Linux")
 def fail2ban_setup_alpine():
@@ -13,7 +15,7 @@ def fail2ban_setup_alpine():
     )
 
     # Check if fail2ban is installed
-    if host.get_fact(File, path="/usr/bin/fail2ban-server") is None:
+    if cached_fact(host, File, path="/usr/bin/fail2ban-server") is None:
         host.noop("Skip Fail2Ban setup - fail2ban is not installed")
         return
 
@@ -25,15 +27,16 @@ def fail2ban_setup_alpine():
     )
 
     # Ensure the Fail2Ban log directory exists
-    if host.get_fact(Directory, path="/var/log/fail2ban") is None:
-        files.directory(
+    if cached_fact(host, Directory, path="/var/log/fail2ban") is None:
+        if files.directory(
             name="Create Fail2Ban log directory",
             path="/var/log/fail2ban",
             present=True,
-        )
+        ).will_change:
+            invalidate_facts(host, Directory, path="/var/log/fail2ban")
 
     # Check if OpenRC and the fail2ban service file exist
-    if host.get_fact(File, path="/etc/init.d/fail2ban") is None:
+    if cached_fact(host, File, path="/etc/init.d/fail2ban") is None:
         host.noop("Skip service setup - fail2ban service not found")
     else:
         # Enable and start Fail2Ban service
@@ -1,8 +1,12 @@
 from pyinfra import host
 from pyinfra.api import deploy
 from pyinfra.facts.apk import ApkPackages
-from pyinfra.facts.server import LinuxName, LinuxDistribution
-from pyinfra.operations import apk, server
+
+from infraninja.security.common.distro import has_binary, os_profile
+from infraninja.security.common.packages import (
+    install_missing_packages,
+    wanted_packages,
+)
 
 # Define defaults for each security tool and related packages
 DEFAULTS = {
@@ -46,20 +50,14 @@ DEFAULTS = {
 @deploy("Install Security Tools", data_defaults=DEFAULTS)
 def install_security_tools():
     # Check OS and package manager
-    linux_name = host.get_fact(LinuxName)
-    linux_dist = host.get_fact(LinuxDistribution)
-
-    is_alpine = any("alpine" in str(name).lower() for name in [linux_name, linux_dist])
+    profile = os_profile()
 
-    if not is_alpine:
+    if "alpine" not in [profile["distro"], *profile["like"]]:
         print("[ERROR] This script requires Alpine Linux")
         return False
 
     # Verify APK is available
-    if not server.shell(
-        name="Check if APK exists",
-        commands=["command -v apk"],
-    ):
+    if not has_binary("apk"):
         print("[ERROR] APK package manager not found")
         return False
 
@@ -70,20 +68,9 @@ def install_security_tools():
     except Exception:
         print("[WARNING] Could not determine installed packages")
 
-    # Loop over each tool in the host data
-    for _, tool_data in host.data.security_tools.items():
-        if not tool_data["install"]:
-            continue
-
-        for package in tool_data["packages"]:
-            if package in installed_packages:
-                print(f"[INFO] Package {package} is already installed")
-                continue
-
-            # Attempt to install the package
-            apk.packages(
-                packages=[package],
-                present=True,
-            )
+    # Install everything missing in a single apk transaction
+    install_missing_packages(
+        wanted_packages(host.data.security_tools), installed_packages
+    )
 
     return True
@@ -5,6 +5,8 @@ from pyinfra import host
 from pyinfra.facts.files import File, Directory
 from pathlib import Path
 
+from infraninja.utils.fact_cache import cached_fact, invalidate_facts
+
 
 @deploy("Suricata Setup")
 def suricata_setup() -> bool:
@@ -13,18 +15,19 @@ def suricata_setup() -> bool:
     logrotate_path: Path = template_dir.joinpath("suricata_logrotate.j2")
 
     # Check if Suricata is installed
-    if host.get_fact(File, path="/usr/bin/suricata") is None:
+    if cached_fact(host, File, path="/usr/bin/suricata") is None:
         host.noop("Skip Suricata setup - suricata not installed")
         return False
 
     # Ensure config directory exists
-    if host.get_fact(Directory, path="/etc/suricata") is None:
-        files.directory(
+    if cached_fact(host, Directory, path="/etc/suricata") is None:
+        if files.directory(
             name="Create Suricata config directory",
             path="/etc/suricata",
             present=True,
             _ignore_errors=True,
-        )
+        ).will_change:
+            invalidate_facts(host, Directory, path="/etc/suricata")
 
     # Upload Suricata configuration
     if not files.template(
@@ -36,15 +39,16 @@ def suricata_setup() -> bool:
         return False
 
     # Create log directory
-    if host.get_fact(Directory, path="/var/log/suricata") is None:
-        files.directory(
+    if cached_fact(host, Directory, path="/var/log/suricata") is None:
+        if files.directory(
             name="Create Suricata log directory",
             path="/var/log/suricata",
             present=True,
-        )
+        ).will_change:
+            invalidate_facts(host, Directory, path="/var/log/suricata")
 
     # Check and enable Suricata service
-    if host.get_fact(File, path="/etc/init.d/suricata") is None:
+    if cached_fact(host, File, path="/etc/init.d/suricata") is None:
         host.noop("Skip Suricata service - service not found")
     else:
         openrc.service(
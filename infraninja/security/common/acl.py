@@ -1,22 +1,16 @@
+import shlex
+from typing import Dict, List, Optional, Tuple, Union
+
+from pyinfra import host
 from pyinfra.api import deploy
 from pyinfra.operations import server
-from pyinfra import host
-from pyinfra.facts.files import File
 
+from infraninja.facts.acl import Acls
+from infraninja.security.common.distro import has_binary
 
-@deploy("Set ACL")
-def acl_setup():
-    # Check if setfacl is available
-    if not server.shell(
-        name="Check if setfacl exists",
-        commands=["command -v setfacl"],
-        _ignore_errors=True,
-    ):
-        host.noop("Skip ACL setup - setfacl not found")
-        return
-
-    # Define the ACL paths and rules
-    ACL_PATHS = {
+# ACL rules per path, in setfacl -m form, overridable through host data
+DEFAULTS = {
+    "acl_rules": {
         "/etc/fail2ban": "u:root:rwx",
         "/var/log/lynis-report.dat": "u:root:r",
         "/etc/audit/audit.rules": "g:root:rwx",
@@ -30,20 +24,82 @@ def acl_setup():
         "/etc/udev/rules.d": "u:root:rwx",
         "/etc/fstab": "u:root:rw",
     }
+}
 
-    for path, acl_rule in ACL_PATHS.items():
-        # Check if path exists before attempting to set ACL
-        if host.get_fact(File, path=path) is None:
-            host.noop(f"Skip ACL for {path} - path does not exist")
+_TAGS = {"u": "user", "g": "group", "m": "mask", "o": "other"}
+
+
+def normalize_acl_rule(rule: str) -> Tuple[str, str]:
+    """
+    Split a setfacl rule into the getfacl entry it sets and its permissions:
+    ``"u:root:rw"`` -> ``("user:root:", "rw-")``, ``"d:g::rx"`` ->
+    ``("default:group::", "r-x")``.
+    """
+    parts = rule.strip().split(":")
+    prefix = ""
+    if parts[0] in ("d", "default"):
+        prefix, parts = "default:", parts[1:]
+    tag = _TAGS.get(parts[0], parts[0])
+    # "other" and "mask" may omit the qualifier: "o::r" and "o:r" are the same
+    qualifier = parts[1] if len(parts) > 2 else ""
+    permissions = parts[-1]
+    normalized = "".join(
+        flag if flag in permissions else "-" for flag in ("r", "w", "x")
+    )
+    return f"{prefix}{tag}:{qualifier}:", normalized
+
+
+def plan_acls(
+    current: Dict[str, Optional[Dict[str, str]]],
+    rules: Dict[str, Union[str, List[str]]],
+) -> Dict[str, Tuple[str, List[str]]]:
+    """``{path: (status, rules to apply)}`` with status changed/unchanged/missing."""
+    plan: Dict[str, Tuple[str, List[str]]] = {}
+    for path, path_rules in rules.items():
+        entries = current.get(path)
+        if entries is None:
+            plan[path] = ("missing", [])
             continue
+        if isinstance(path_rules, str):
+            path_rules = [path_rules]
+        pending = [
+            rule
+            for rule in path_rules
+            if entries.get(normalize_acl_rule(rule)[0]) != normalize_acl_rule(rule)[1]
+        ]
+        plan[path] = ("changed" if pending else "unchanged", pending)
+    return plan
+
 
-        # Attempt to set the ACL
-        try:
-            server.shell(
-                name=f"Set ACL for {path}",
-                commands=[f"setfacl -m {acl_rule} {path}"],
-                _ignore_errors=True,
+@deploy("Set ACL", data_defaults=DEFAULTS)
+def acl_setup() -> Optional[Dict[str, str]]:
+    """
+    Apply the ``acl_rules`` of the host: the ACLs of every path are read in
+    one go, compared with the rules, and only the differences are applied,
+    in one command. Returns ``{path: "changed" | "unchanged" | "missing"}``.
+    """
+    # Check if setfacl is available
+    if not has_binary("setfacl") or not has_binary("getfacl"):
+        host.noop("Skip ACL setup - setfacl not found")
+        return None
+
+    rules = host.data.acl_rules
+    plan = plan_acls(host.get_fact(Acls, paths=sorted(rules)), rules)
+
+    commands = []
+    for path, (status, pending) in plan.items():
+        if status == "missing":
+            host.noop(f"Skip ACL for {path} - path does not exist")
+        elif pending:
+            commands.append(
+                f"setfacl -m {shlex.quote(','.join(pending))} {shlex.quote(path)}"
             )
-        except Exception as e:
-            host.noop(f"Failed to set ACL for {path} - {str(e)}")
-    return True
+
+    if commands:
+        changed = [path for path, (status, _) in plan.items() if status == "changed"]
+        server.shell(
+            name=f"Set ACL for {', '.join(changed)}",
+            commands=["\n".join(commands)],
+            _ignore_errors=True,
+        )
+    return {path: status for path, (status, _) in plan.items()}
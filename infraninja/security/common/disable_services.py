@@ -1,58 +1,65 @@
+import shlex
+from typing import Dict, List
+
 from pyinfra import host
 from pyinfra.api import deploy
-from pyinfra.facts.server import LinuxName
-from pyinfra.operations import openrc, systemd, server
+from pyinfra.operations import server
 
-# Get the OS type
-os = host.get_fact(LinuxName)
+from infraninja.facts.services import ServiceStates
+from infraninja.security.common.distro import os_profile
 
-# List of services to disable if present
+# List of services to disable if present, overridable through host data
 common_services = ["avahi-daemon", "cups", "bluetooth", "rpcbind", "vsftpd", "telnet"]
 
+DEFAULTS = {"disabled_services": common_services}
+
+
+def _disable_command(init: str, services: List[str]) -> str:
+    """One command stopping and disabling every service."""
+    if init == "openrc":
+        quoted = " ".join(shlex.quote(service) for service in services)
+        return (
+            f"for s in {quoted}; do "
+            'rc-service "$s" stop; rc-update -a del "$s"; done; true'
+        )
+    units = " ".join(shlex.quote(f"{service}.service") for service in services)
+    return f"systemctl disable --now {units}"
+
+
+@deploy("Disable useless services common", data_defaults=DEFAULTS)
+def disable_useless_services_common() -> Dict[str, str]:
+    """
+    Stop and disable the ``disabled_services`` of the host with one state
+    read and one command. Returns ``{service: "disabled" | "inactive" |
+    "absent"}``.
+    """
+    profile = os_profile()
+    services = list(host.data.disabled_services)
+    if profile["init"] not in ("systemd", "openrc"):
+        host.noop(
+            f"Skip disabling {', '.join(services)} - unsupported init system "
+            f"on {profile['name']}"
+        )
+        return {}
 
-@deploy("Disable useless services common")
-def disable_useless_services_common():
-    for service in common_services:
-        if os == "Ubuntu":
-            try:
-                if server.shell(
-                    name=f"Check {service} status on Ubuntu",
-                    commands=[f"systemctl is-active {service}"],
-                    _ignore_errors=True,
-                ):
-                    systemd.service(
-                        name=f"Disable {service}",
-                        service=service,
-                        running=False,
-                        enabled=False,
-                        _ignore_errors=True,
-                    )
-                    host.noop(f"Disabled service: {service} on Ubuntu")
-                else:
-                    host.noop(f"Skip {service} - not active on Ubuntu")
-            except Exception as e:
-                host.noop(f"Failed to handle {service} on Ubuntu: {str(e)}")
-
-        elif os == "Alpine":
-            try:
-                if server.shell(
-                    name=f"Check {service} status on Alpine",
-                    commands=[f"rc-service {service} status"],
-                    _ignore_errors=True,
-                ):
-                    openrc.service(
-                        name=f"Disable {service}",
-                        service=service,
-                        running=False,
-                        enabled=False,
-                        _ignore_errors=True,
-                    )
-                    host.noop(f"Disabled service: {service} on Alpine")
-                else:
-                    host.noop(f"Skip {service} - not active on Alpine")
-            except Exception as e:
-                host.noop(f"Failed to handle {service} on Alpine: {str(e)}")
+    states = host.get_fact(ServiceStates, services=services, init=profile["init"])
+    status: Dict[str, str] = {}
+    for service in services:
+        state = states.get(service) or {}
+        if not state.get("exists"):
+            status[service] = "absent"
+        elif state.get("active") or state.get("enabled"):
+            status[service] = "disabled"
         else:
-            host.noop(f"Skip {service} - unsupported OS: {os}")
+            status[service] = "inactive"
 
-    return True
+    to_disable = [service for service, result in status.items() if result == "disabled"]
+    if to_disable:
+        server.shell(
+            name=f"Disable {', '.join(to_disable)}",
+            commands=[_disable_command(profile["init"], to_disable)],
+            _ignore_errors=True,
+        )
+    else:
+        host.noop(f"Skip services - none active on {profile['name']}")
+    return status
@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pyinfra
+from pyinfra.operations import apk, apt, openrc, systemd
+
+from infraninja.facts.os_profile import OsProfile
+from infraninja.utils.fact_cache import cached_fact, invalidate_facts
+
+# host name -> OsProfile, so every deploy in a run shares one remote read
+_profiles: Dict[str, Dict[str, Any]] = {}
+
+
+def _current(host: Optional[Any]) -> Any:
+    return pyinfra.host if host is None else host
+
+
+def os_profile(host: Optional[Any] = None) -> Dict[str, Any]:
+    """The OsProfile of a host (the current one by default), read once per run."""
+    host = _current(host)
+    if host.name not in _profiles:
+        _profiles[host.name] = cached_fact(host, OsProfile)
+    return _profiles[host.name]
+
+
+def forget_os_profile(host: Optional[Any] = None) -> None:
+    """Re-read the profile next time, e.g. after installing packages."""
+    host = _current(host)
+    _profiles.pop(host.name, None)
+    invalidate_facts(host, OsProfile)
+
+
+def has_binary(name: str, host: Optional[Any] = None) -> bool:
+    return name in os_profile(host)["binaries"]
+
+
+@dataclass(frozen=True)
+class DistroBackend:
+    """The operations the security deploys use on one family of distributions."""
+
+    name: str
+    distros: Tuple[str, ...]  # os-release IDs handled, also matched on ID_LIKE
+    service: Callable[..., Any]
+    packages: Callable[..., Any]
+    update: Callable[..., Any]
+    upgrade: Callable[..., Any]
+    ssh_service: str
+
+
+_backends: Dict[str, DistroBackend] = {}
+
+
+def register_backend(backend: DistroBackend) -> DistroBackend:
+    """Add (or replace, by name) the backend of a distribution family."""
+    _backends[backend.name] = backend
+    return backend
+
+
+def backend_for(host: Optional[Any] = None) -> DistroBackend:
+    """
+    The backend for a host, resolved at call time from its OsProfile: by
+    distribution ID first, then by the distributions it is like.
+    """
+    profile = os_profile(host)
+    for candidates in ([profile["distro"]], profile["like"]):
+        for backend in _backends.values():
+            if any(distro in backend.distros for distro in candidates):
+                return backend
+    raise ValueError(f"Unsupported OS: {profile['name'] or profile['distro']}")
+
+
+register_backend(
+    DistroBackend(
+        name="debian",
+        distros=("ubuntu", "debian"),
+        service=systemd.service,
+        packages=apt.packages,
+        update=apt.update,
+        upgrade=apt.upgrade,
+        ssh_service="ssh",
+    )
+)
+register_backend(
+    DistroBackend(
+        name="alpine",
+        distros=("alpine",),
+        service=openrc.service,
+        packages=apk.packages,
+        update=apk.update,
+        upgrade=apk.upgrade,
+        ssh_service="sshd",
+    )
+)
@@ -1,35 +1,12 @@
 from pyinfra import host
 from pyinfra.api import deploy
-from pyinfra.facts.server import LinuxName
-from pyinfra.operations import server, files
 
+from infraninja.security.common.distro import has_binary, os_profile
+from infraninja.security.common.sysctl import apply_sysctl
 
-@deploy("Kernel Security Hardening")
-def kernel_hardening():
-    # Check if running on Linux
-    linux_name = host.get_fact(LinuxName)
-
-    if not linux_name:
-        print("[ERROR] This script requires a Linux system")
-        return False
-
-    # Verify sysctl is available
-    if not server.shell(
-        name="Check if sysctl exists",
-        commands=["command -v sysctl"],
-    ):
-        print("[ERROR] sysctl command not found")
-        return False
-
-    # Create sysctl config directory if it doesn't exist
-    files.directory(
-        name="Ensure sysctl.d directory exists",
-        path="/etc/sysctl.d",
-        present=True,
-    )
-
-    # Kernel hardening configuration
-    sysctl_config = {
+# Kernel hardening configuration, overridable through host data
+DEFAULTS = {
+    "kernel_sysctl": {
         # Network Security
         "net.ipv4.conf.all.accept_redirects": "0",
         "net.ipv4.conf.default.accept_redirects": "0",
@@ -55,47 +32,27 @@ def kernel_hardening():
         "kernel.dmesg_restrict": "1",
         "kernel.kptr_restrict": "2",
     }
+}
 
-    # Apply sysctl settings with error handling
-    failed_settings = []
-    for key, value in sysctl_config.items():
-        try:
-            # Check if sysctl key exists
-            if not server.shell(
-                name=f"Check if {key} exists",
-                commands=[f"test -f /proc/sys/{key.replace('.', '/')}"],
-                _ignore_errors=True,
-            ):
-                host.noop(f"Skip {key} - parameter not supported")
-                continue
-
-            server.sysctl(
-                name=f"Set {key} to {value}",
-                key=key,
-                value=value,
-                persist=True,
-                persist_file="/etc/sysctl.d/99-security.conf",
-            )
-        except Exception as e:
-            failed_settings.append(key)
-            host.noop(f"Failed to set {key}: {str(e)}")
-            continue
 
-    # Apply settings
-    try:
-        server.shell(
-            name="Apply sysctl settings",
-            commands=["sysctl -p /etc/sysctl.d/99-security.conf"],
-            _ignore_errors=True,
-        )
-    except Exception as e:
-        host.noop(f"Warning - Failed to apply sysctl settings: {str(e)}")
+@deploy("Kernel Security Hardening", data_defaults=DEFAULTS)
+def kernel_hardening():
+    # Check if running on Linux
+    if not os_profile()["distro"]:
+        print("[ERROR] This script requires a Linux system")
+        return False
 
-    if failed_settings:
-        host.noop(
-            f"Warning - Failed to set some kernel parameters: {', '.join(failed_settings)}"
-        )
+    # Verify sysctl is available
+    if not has_binary("sysctl"):
+        print("[ERROR] sysctl command not found")
         return False
 
+    # Read, diff and apply every setting in one go
+    status = apply_sysctl(host.data.kernel_sysctl)
+
+    for key, result in status.items():
+        if result == "unsupported":
+            host.noop(f"Skip {key} - parameter not supported")
+
     host.noop("Success - Kernel hardening completed")
     return True
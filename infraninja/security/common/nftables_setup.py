@@ -1,10 +1,8 @@
 from importlib.resources import files as resource_files
-from pyinfra import host
 from pyinfra.api import deploy
-from pyinfra.facts.server import LinuxName
-from pyinfra.operations import files, openrc, server, systemd
+from pyinfra.operations import files, server
 
-os = host.get_fact(LinuxName)
+from infraninja.security.common.distro import backend_for
 
 
 @deploy("nftables Setup for Alpine Linux")
@@ -34,17 +32,8 @@ def nftables_setup_alpine():
         commands="nft -f /etc/nftables/ruleset.nft",
     )
 
-
-# Enable nftables to restore rules on reboot based on OS
-if os == "Ubuntu":
-    systemd.service(
-        name="Enable nftables service",
-        service="nftables",
-        running=True,
-        enabled=True,
-    )
-elif os == "Alpine":
-    openrc.service(
+    # Enable nftables to restore rules on reboot
+    backend_for().service(
         name="Enable nftables service",
         service="nftables",
         running=True,
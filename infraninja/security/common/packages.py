@@ -0,0 +1,46 @@
+from typing import Any, Collection, Dict, List
+
+from pyinfra import host
+from pyinfra.api import deploy
+from pyinfra.facts.files import Directory, File
+
+from infraninja.security.common.distro import backend_for, forget_os_profile
+from infraninja.utils.fact_cache import invalidate_facts
+
+
+def wanted_packages(tools: Dict[str, Dict[str, Any]]) -> List[str]:
+    """The packages of every tool set to install, in order, without duplicates."""
+    packages: Dict[str, None] = {}
+    for tool_data in tools.values():
+        if tool_data["install"]:
+            packages.update(dict.fromkeys(tool_data["packages"]))
+    return list(packages)
+
+
+@deploy("Install missing packages")
+def install_missing_packages(
+    packages: List[str], installed: Collection[str]
+) -> List[str]:
+    """
+    Install the ``packages`` not in ``installed`` (a DebPackages/ApkPackages
+    fact read once by the caller) in a single package manager transaction.
+    Returns the packages that were missing.
+    """
+    missing = [package for package in packages if package not in installed]
+    present = len(packages) - len(missing)
+    if present:
+        print(f"[INFO] {present} package(s) already installed, skipping them")
+    if not missing:
+        return []
+
+    op = backend_for().packages(
+        name=f"Install {', '.join(missing)}",
+        packages=missing,
+        present=True,
+    )
+    if op.will_change:
+        # New binaries and files: cached facts about them are now stale
+        forget_os_profile()
+        invalidate_facts(host, File)
+        invalidate_facts(host, Directory)
+    return missing
@@ -0,0 +1,82 @@
+import shlex
+from typing import Any, Dict, List, Optional, Tuple
+
+from pyinfra import host
+from pyinfra.api import deploy
+from pyinfra.facts.files import FileContents
+from pyinfra.operations import server
+
+from infraninja.security.common.distro import backend_for, os_profile
+from infraninja.utils.shell import atomic_write_script
+
+SSHD_CONFIG = "/etc/ssh/sshd_config"
+BLOCK_BEGIN = "# BEGIN infraninja managed options"
+BLOCK_END = "# END infraninja managed options"
+
+
+def plan_sshd_config(
+    lines: Optional[List[str]], options: Dict[str, Any]
+) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Render ``sshd_config`` with ``options`` in a managed block at the top of
+    the file. sshd uses the first value it reads for an option, so the block
+    wins over later lines and over ``Include``d ``sshd_config.d`` files,
+    whatever they say. Options dropped from ``options`` leave the block.
+    Returns the new lines and ``{option: "changed" | "unchanged"}``.
+    """
+    managed: Dict[str, str] = {}
+    rest: List[str] = []
+    inside = False
+    for line in lines or []:
+        stripped = line.strip()
+        if stripped == BLOCK_BEGIN:
+            inside = True
+        elif stripped == BLOCK_END:
+            inside = False
+        elif inside:
+            key = stripped.split(None, 1)[0] if stripped else ""
+            managed[key.lower()] = stripped
+        else:
+            rest.append(line)
+
+    block = [f"{option} {value}" for option, value in options.items()]
+    status = {
+        option: "unchanged" if managed.get(option.lower()) == wanted else "changed"
+        for option, wanted in zip(options, block)
+    }
+    return [BLOCK_BEGIN, *block, BLOCK_END, *rest], status
+
+
+@deploy("Manage sshd_config")
+def manage_sshd_config(
+    options: Dict[str, Any], path: str = SSHD_CONFIG
+) -> Dict[str, str]:
+    """
+    Set sshd options with one read of ``sshd_config`` and, if anything
+    changed, one validated write followed by a reload (never a restart, so
+    established sessions survive). Returns ``{option: "changed" |
+    "unchanged"}``.
+    """
+    current = host.get_fact(FileContents, path=path)
+    lines, status = plan_sshd_config(current, options)
+    if lines == current:
+        return status
+
+    sshd = os_profile()["binaries"].get("sshd", "/usr/sbin/sshd")
+    changed = [option for option, result in status.items() if result == "changed"]
+    server.shell(
+        name=f"Configure SSH: {', '.join(changed) or 'managed options'}",
+        # Only replaced once sshd -t accepts it, so a bad option can't lock us out
+        commands=[
+            atomic_write_script(path, lines, validate=f'{shlex.quote(sshd)} -t -f "$t"')
+        ],
+    )
+
+    backend = backend_for()
+    backend.service(
+        name="Reload SSH",
+        service=backend.ssh_service,
+        running=True,
+        reloaded=True,
+    )
+    return status
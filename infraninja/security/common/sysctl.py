@@ -0,0 +1,108 @@
+import shlex
+from typing import Any, Dict, List, Optional, Tuple
+
+from pyinfra import host
+from pyinfra.api import deploy
+from pyinfra.operations import server
+
+from infraninja.facts.sysctl import SysctlState, normalize_value
+from infraninja.security.common.distro import has_binary
+from infraninja.utils.shell import atomic_write_script
+
+SYSCTL_FILE = "/etc/sysctl.d/99-security.conf"
+_HEADER = "# Managed by infraninja, local changes will be overwritten"
+
+# (host name, path) -> lines of the file as planned by earlier calls this run.
+# Facts are read while planning, before any write runs, so later calls must
+# build on what earlier ones will write rather than on the file they read.
+_planned: Dict[Tuple[str, str], List[str]] = {}
+
+
+def parse_sysctl_file(lines: Optional[List[str]]) -> Dict[str, str]:
+    """``key = value`` lines of a sysctl.d file, in order, without comments."""
+    settings: Dict[str, str] = {}
+    for line in lines or []:
+        line = line.strip()
+        if not line or line.startswith(("#", ";")):
+            continue
+        key, sep, value = line.partition("=")
+        if sep:
+            settings[key.strip().lstrip("-")] = normalize_value(value)
+    return settings
+
+
+def render_sysctl_file(settings: Dict[str, str]) -> List[str]:
+    return [_HEADER] + [f"{key} = {value}" for key, value in settings.items()]
+
+
+@deploy("Apply sysctl settings")
+def apply_sysctl(settings: Dict[str, Any], path: str = SYSCTL_FILE) -> Dict[str, str]:
+    """
+    Make the kernel and ``path`` hold ``settings``, with one fact read and at
+    most one operation: every key's live value and the file are read at once,
+    the diff is computed here, and the file is rewritten atomically and
+    loaded only if something changed.
+
+    Settings merge into the keys already in the file and those planned by
+    earlier calls for the same host, so several deploys (kernel hardening,
+    ARP protection, routing controls, profiles) can share it in one run. Keys
+    the kernel doesn't have are left out; keys it has but won't read back are
+    written without a drift check. Returns ``{key: "changed" | "unchanged" |
+    "unsupported" | "unreadable"}``.
+    """
+    if not has_binary("sysctl"):
+        host.noop("Skip sysctl settings - sysctl not found")
+        return {}
+
+    wanted = {key: normalize_value(value) for key, value in settings.items()}
+    state = host.get_fact(SysctlState, keys=sorted(wanted), path=path)
+    live = state["values"]
+    unreadable = set(state["unreadable"])
+
+    current = _planned.get((host.name, path), state["file"])
+    status: Dict[str, str] = {}
+    merged = parse_sysctl_file(current)
+    for key, value in wanted.items():
+        if key in unreadable:
+            # No live value to compare, so only a file change applies it
+            status[key] = "unreadable"
+            merged[key] = value
+            continue
+        if live.get(key) is None and key in live:
+            status[key] = "unsupported"
+            merged.pop(key, None)
+            continue
+        status[key] = "unchanged" if live.get(key) == value else "changed"
+        merged[key] = value
+
+    lines = render_sysctl_file(merged)
+    _planned[(host.name, path)] = lines
+    changed = [key for key, result in status.items() if result == "changed"]
+    if lines != current:
+        server.shell(
+            name=f"Write {path} ({len(changed)} changed)",
+            commands=[
+                atomic_write_script(
+                    path, lines, mode="644", post=f"sysctl -p {shlex.quote(path)}"
+                )
+            ],
+            _ignore_errors=True,
+        )
+    elif changed:
+        # The file is right, but the running kernel drifted from it
+        server.shell(
+            name=f"Reload {path} ({len(changed)} changed)",
+            commands=[f"sysctl -p {shlex.quote(path)}"],
+            _ignore_errors=True,
+        )
+    return status
+
+
+@deploy("Apply sysctl profile")
+def sysctl_profile(settings: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """Apply a user-supplied profile, ``sysctl_profile`` from host data by default."""
+    settings = settings if settings is not None else host.data.get("sysctl_profile")
+    if not settings:
+        host.noop("Skip sysctl profile - no settings given")
+        return {}
+    return apply_sysctl(settings)
@@ -1,7 +1,11 @@
 from pyinfra import host
 from pyinfra.api import deploy
-from pyinfra.facts.apt import AptSources
-from pyinfra.operations import apt
+from pyinfra.facts.deb import DebPackages
+
+from infraninja.security.common.packages import (
+    install_missing_packages,
+    wanted_packages,
+)
 
 # Define defaults for each security tool and related packages
 DEFAULTS = {
@@ -64,19 +68,9 @@ DEFAULTS = {
 
 @deploy("Install Security Tools", data_defaults=DEFAULTS)
 def install_security_tools():
-    # Loop over each tool in the host data
-    for _, tool_data in host.data.security_tools.items():
-        # Check if the tool is set to install
-        if tool_data["install"]:
-            for package in tool_data["packages"]:
-                installed_packages = host.get_fact(AptSources)
-
-                # Check if package is installed
-                if package not in installed_packages:
-                    # Install the specified package
-                    apt.packages(
-                        name=f"Install {package}",
-                        packages=[package],
-                    )
-                else:
-                    print(f"{package} is already installed, skipping.")
+    # Read the installed packages once, then install everything missing in
+    # a single apt transaction
+    installed_packages = host.get_fact(DebPackages)
+    install_missing_packages(
+        wanted_packages(host.data.security_tools), installed_packages
+    )
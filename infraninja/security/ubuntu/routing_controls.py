@@ -1,5 +1,7 @@
 from pyinfra.api import deploy
-from pyinfra.operations import server, systemd
+from pyinfra.operations import systemd
+
+from infraninja.security.common.sysctl import apply_sysctl
 
 
 @deploy("Apply Routing Controls")
@@ -7,11 +9,5 @@ def routing_controls():
     systemd.service("apparmor", running=True, enabled=True)
     systemd.service("auditd", running=True, enabled=True)
 
-    server.sysctl(
-        name="Enable positive source/destination address checks",
-        key="net.ipv4.conf.all.rp_filter",
-        value=1,
-        persist=True,
-    )
-
-    server.shell(name="Reload sysctl settings", commands=["sysctl -p"])
+    # Enable positive source/destination address checks
+    apply_sysctl({"net.ipv4.conf.all.rp_filter": 1})
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Type
+
+from pyinfra.api import FactBase
+
+from infraninja.inventory.config import NinjaConfig
+from infraninja.inventory.files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Seconds a fact is reused, by fact class name; the rest use the default TTL.
+# Facts that change on their own (load, uptime, last login) should be 0.
+DEFAULT_TTLS: Dict[str, int] = {
+    "LinuxName": 7 * 24 * 3600,
+    "LinuxDistribution": 7 * 24 * 3600,
+    "Arch": 7 * 24 * 3600,
+    "Kernel": 24 * 3600,
+    "Hostname": 24 * 3600,
+    "OsProfile": 24 * 3600,
+    "Command": 0,
+}
+
+
+def _encode(value: Any) -> Any:
+    """Make a fact value JSON-safe, tagging the types JSON can't represent."""
+    if isinstance(value, dict):
+        return {"__dict__": [[_encode(k), _encode(v)] for k, v in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return {"__set__": [_encode(item) for item in value]}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"Cannot cache a {type(value).__name__}")
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if isinstance(value, dict):
+        if "__dict__" in value:
+            return {_decode(k): _decode(v) for k, v in value["__dict__"]}
+        if "__set__" in value:
+            return {_decode(item) for item in value["__set__"]}
+        if "__datetime__" in value:
+            return datetime.fromisoformat(value["__datetime__"])
+    return value
+
+
+def fact_name(fact_cls: Type[FactBase]) -> str:
+    return f"{fact_cls.__module__}.{fact_cls.__name__}"
+
+
+class FactCache:
+    """
+    Controller-side cache of pyinfra facts, persisted between runs so repeated
+    audits and dry runs don't re-read unchanged hosts. Entries are keyed by
+    host, fact class and arguments, expire after a per-fact TTL, and must be
+    invalidated by the deploys that change the state they describe.
+
+    Hosts can override TTLs with ``fact_cache_ttls`` in their data, e.g.
+    ``{"Users": 600, "File": 0}``. A TTL of 0 disables caching of that fact.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        default_ttl: int = 3600,
+        ttls: Optional[Dict[str, int]] = None,
+        enabled: bool = True,
+    ) -> None:
+        self.cache_dir = Path(cache_dir) / "facts"
+        self.default_ttl = default_ttl
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.enabled = enabled
+        self._hosts: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, config: NinjaConfig) -> "FactCache":
+        return cls(config.cache_dir, config.fact_ttl, enabled=config.fact_cache)
+
+    def _path(self, host_name: str) -> Path:
+        digest = hashlib.sha256(host_name.encode()).hexdigest()
+        return self.cache_dir / f"{digest[:16]}.json"
+
+    def _entries(self, host_name: str) -> Dict[str, Dict[str, Any]]:
+        if host_name not in self._hosts:
+            try:
+                with open(self._path(host_name), "r") as file:
+                    self._hosts[host_name] = json.load(file).get("facts", {})
+            except (OSError, ValueError):
+                self._hosts[host_name] = {}
+        return self._hosts[host_name]
+
+    def _save(self, host_name: str) -> None:
+        try:
+            with atomic_write(self._path(host_name)) as file:
+                json.dump({"host": host_name, "facts": self._hosts[host_name]}, file)
+        except OSError as e:
+            logger.debug("Could not write fact cache for %s: %s", host_name, e)
+
+    def ttl(self, host: Any, fact_cls: Type[FactBase]) -> int:
+        overrides = host.data.get("fact_cache_ttls") or {}
+        name = fact_cls.__name__
+        return int(overrides.get(name, self.ttls.get(name, self.default_ttl)))
+
+    @staticmethod
+    def _key(fact_cls: Type[FactBase], args: tuple, kwargs: Dict[str, Any]) -> str:
+        arguments = json.dumps([args, kwargs], sort_keys=True, default=str)
+        return f"{fact_name(fact_cls)} {arguments}"
+
+    def get(
+        self, host: Any, fact_cls: Type[FactBase], *args: Any, **kwargs: Any
+    ) -> Any:
+        """``host.get_fact(fact_cls, ...)``, served from the cache while fresh."""
+        ttl = self.ttl(host, fact_cls) if self.enabled else 0
+        if ttl <= 0:
+            return host.get_fact(fact_cls, *args, **kwargs)
+
+        key = self._key(fact_cls, args, kwargs)
+        with self._lock:
+            entry = self._entries(host.name).get(key)
+            if entry and time.time() < entry["expires"]:
+                return _decode(entry["value"])
+
+        value = host.get_fact(fact_cls, *args, **kwargs)
+        try:
+            encoded = _encode(value)
+        except TypeError as e:
+            logger.debug("Not caching %s: %s", fact_name(fact_cls), e)
+            return value
+        with self._lock:
+            self._entries(host.name)[key] = {
+                "expires": time.time() + ttl,
+                "value": encoded,
+            }
+            self._save(host.name)
+        return value
+
+    def invalidate(
+        self,
+        host: Any,
+        fact_cls: Optional[Type[FactBase]] = None,
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Drop cached facts of a host: one fact call when arguments are given,
+        every call of ``fact_cls`` otherwise, or all of the host's facts.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            entries = self._entries(host.name)
+            if fact_cls is None:
+                dropped = list(entries)
+            elif args or kwargs:
+                dropped = [self._key(fact_cls, args, kwargs)]
+            else:
+                prefix = f"{fact_name(fact_cls)} "
+                dropped = [key for key in entries if key.startswith(prefix)]
+            dropped = [key for key in dropped if entries.pop(key, None) is not None]
+            if dropped:
+                self._save(host.name)
+
+    def clear(self) -> None:
+        """Forget every cached fact of every host."""
+        with self._lock:
+            self._hosts.clear()
+            for path in self.cache_dir.glob("*.json"):
+                path.unlink()
+
+
+_fact_cache: Optional[FactCache] = None
+
+
+def get_fact_cache() -> FactCache:
+    """The process-wide fact cache, configured from the environment."""
+    global _fact_cache
+    if _fact_cache is None:
+        _fact_cache = FactCache.from_config(NinjaConfig.from_env())
+    return _fact_cache
+
+
+def cached_fact(host: Any, fact_cls: Type[FactBase], *args: Any, **kwargs: Any) -> Any:
+    """Read a fact through the controller-side cache."""
+    return get_fact_cache().get(host, fact_cls, *args, **kwargs)
+
+
+def invalidate_facts(
+    host: Any, fact_cls: Optional[Type[FactBase]] = None, *args: Any, **kwargs: Any
+) -> None:
+    """Drop cached facts after an operation changed the state behind them."""
+    get_fact_cache().invalidate(host, fact_cls, *args, **kwargs)
@@ -4,11 +4,13 @@ from pyinfra.operations import files
 from pyinfra.facts.server import Hostname, Command
 from pyinfra.api import deploy
 
+from infraninja.utils.fact_cache import cached_fact
+
 
 @deploy("Update MOTD")
 def motd():
     # Get hostname using the correct fact syntax
-    hostname = host.get_fact(Hostname)
+    hostname = cached_fact(host, Hostname)
 
     # Define the command that will get the last access time
     last_access_cmd = (
@@ -1,16 +1,26 @@
 import getpass
+import hashlib
 import json
 import logging
 import os
+import shlex
 import threading
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 from pyinfra import host
 from pyinfra.api import deploy
-from pyinfra.facts.server import User, Users
+from pyinfra.facts.server import User
 from pyinfra.operations import server
 
+from infraninja.facts.ssh import KEYS_MARKER, AuthorizedKeys, AuthorizedKeysState
+from infraninja.inventory.client import get_session
+from infraninja.inventory.config import NinjaConfig
+from infraninja.inventory.keys import KEY_TYPE_PREFIXES
+from infraninja.utils.session_cache import SessionCache
+from infraninja.utils.shell import atomic_write_script, heredoc
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(message)s",
@@ -18,6 +28,77 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def normalize_key(key: str) -> str:
+    return " ".join(key.split())
+
+
+def key_id(line: str) -> Optional[str]:
+    """
+    Identify an authorized_keys line by its key blob, ignoring options and
+    comments. Returns None for blank and comment lines.
+    """
+    tokens = line.split()
+    if not tokens or tokens[0].startswith("#"):
+        return None
+    for i, token in enumerate(tokens[:-1]):
+        if token.startswith(KEY_TYPE_PREFIXES):
+            return tokens[i + 1]
+    return " ".join(tokens)
+
+
+def plan_authorized_keys(
+    lines: List[str], managed: List[str], desired: List[str], exclusive: bool = False
+) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Return the new authorized_keys lines, the keys added and the lines removed.
+
+    Lines whose key is not desired are removed if infraninja deployed that key
+    before (it is in ``managed``), or with ``exclusive``, always. Other lines,
+    comments and the order of the file are kept; new keys are appended.
+    """
+    desired_ids = {key_id(key): normalize_key(key) for key in desired if key_id(key)}
+    revoked = {key_id(key) for key in managed} - desired_ids.keys()
+
+    kept, removed, present = [], [], set()
+    for line in lines:
+        line_id = key_id(line)
+        if (
+            line_id is not None
+            and line_id not in desired_ids
+            and (exclusive or line_id in revoked)
+        ):
+            removed.append(line)
+            continue
+        kept.append(line)
+        if line_id is not None:
+            present.add(line_id)
+
+    added = [key for kid, key in desired_ids.items() if kid not in present]
+    return kept + added, added, removed
+
+
+def _marker_script(ssh_dir: str, owner: str, digest: str, managed: List[str]) -> str:
+    """Shell commands recording the deployed key set next to authorized_keys."""
+    marker = shlex.quote(f"{ssh_dir}/{KEYS_MARKER}")
+    keys_file = shlex.quote(f"{ssh_dir}/authorized_keys")
+    return (
+        f'{{ printf "%s %s\\n" {digest} '
+        f'"$(sha256sum {keys_file} | cut -d" " -f1)"\n'
+        f"cat {heredoc(managed)}\n"
+        f"}} > {marker}\n"
+        f"chmod 600 {marker}\n"
+        f"chown {owner} {marker}"
+    )
+
+
+def _authorized_keys_script(ssh_dir: str, owner: str, lines: List[str]) -> str:
+    """Shell commands atomically replacing authorized_keys with ``lines``."""
+    write = atomic_write_script(
+        f"{ssh_dir}/authorized_keys", lines, mode="600", owner=owner
+    )
+    return f"umask 077\n{write}\nchown {owner} {shlex.quote(ssh_dir)}"
+
+
 class SSHKeyManager:
     """
     Manages SSH key operations including fetching from API and deploying to hosts.
@@ -30,12 +111,21 @@ class SSHKeyManager:
     _base_url: Optional[str] = None
     _lock: threading.RLock = threading.RLock()  # Reentrant lock for thread safety
     _instance: Optional["SSHKeyManager"] = None  # Singleton instance
+    _session_cache: Optional[SessionCache] = None  # Shared with other processes
+    _fetch_generation: int = 0  # Bumped after every key fetch attempt
+    _failed_until: float = 0.0  # Monotonic time until which a failure is reused
+
+    # Seconds a failed key fetch is remembered, so concurrent and follow-up
+    # callers don't stampede the API (or re-prompt) while it is failing
+    FAILURE_TTL: float = 30.0
 
     @classmethod
     def get_instance(cls) -> "SSHKeyManager":
         """Get or create the singleton instance of SSHKeyManager."""
         if cls._instance is None:
-            cls._instance = SSHKeyManager()
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = SSHKeyManager()
         return cls._instance
 
     def __init__(self) -> None:
@@ -48,28 +138,66 @@ class SSHKeyManager:
     def _get_base_url(self) -> Optional[str]:
         """Get API base URL from environment."""
         if not self._base_url:
-            self._base_url = os.getenv("JINN_API_URL")
+            SSHKeyManager._base_url = os.getenv("JINN_API_URL")
             if not self._base_url:
                 logger.error("Error: JINN_API_URL environment variable not set")
                 return None
         return self._base_url
 
+    def _get_session_cache(self) -> Optional[SessionCache]:
+        """Get the on-disk session and key-list cache, None if disabled."""
+        if self._session_cache is None:
+            config = NinjaConfig.from_env()
+            base_url = self._get_base_url()
+            if not config.session_cache or not base_url:
+                return None
+            # Scoped by user, so another JINN_USERNAME never gets this session
+            username = os.environ.get("JINN_USERNAME") or (self._credentials or {}).get(
+                "username"
+            )
+            SSHKeyManager._session_cache = SessionCache.from_config(
+                config, base_url, username=username
+            )
+        return self._session_cache
+
+    @staticmethod
+    def has_env_credentials() -> bool:
+        """Whether credentials are supplied via JINN_USERNAME/JINN_PASSWORD."""
+        return bool(os.getenv("JINN_USERNAME") and os.getenv("JINN_PASSWORD"))
+
     def _get_credentials(self) -> Dict[str, str]:
-        """Get user credentials either from cache or user input."""
+        """Get user credentials from cache, the environment or user input."""
+        with self._lock:
+            return self._get_credentials_locked()
+
+    def _get_credentials_locked(self) -> Dict[str, str]:
         if self._credentials:
             logger.debug("Using cached credentials")
             return self._credentials
 
+        if self.has_env_credentials():
+            SSHKeyManager._credentials = {
+                "username": os.environ["JINN_USERNAME"],
+                "password": os.environ["JINN_PASSWORD"],
+            }
+            logger.debug("Credentials obtained from environment")
+            return self._credentials
+
         username: str = input("Enter username: ")
         password: str = getpass.getpass("Enter password: ")
-        self._credentials = {"username": username, "password": password}
+        SSHKeyManager._credentials = {"username": username, "password": password}
         logger.debug("Credentials obtained from user input")
         return self._credentials
 
     def _make_auth_request(
-        self, endpoint: str, method: str = "get", **kwargs: Any
+        self,
+        endpoint: str,
+        method: str = "get",
+        headers: Optional[Dict[str, str]] = None,
+        accept: Tuple[int, ...] = (200,),
+        **kwargs: Any,
     ) -> Optional[requests.Response]:
-        """Make authenticated request to API."""
+        """Make authenticated request to API, returning responses in ``accept``."""
         if not self._session_key:
             return None
 
@@ -77,14 +205,15 @@ class SSHKeyManager:
             "Authorization": f"Bearer {self._session_key}",
             "Content-Type": "application/json",
             "Accept": "application/json",
+            **(headers or {}),
         }
         cookies = {"sessionid": self._session_key}
 
         try:
-            response = requests.request(
+            response = get_session().request(
                 method, endpoint, headers=headers, cookies=cookies, timeout=30, **kwargs
             )
-            return response if response.status_code == 200 else None
+            return response if response.status_code in accept else None
         except requests.exceptions.Timeout:
             logger.error("Request timed out")
         except requests.exceptions.RequestException as e:
@@ -93,6 +222,10 @@ class SSHKeyManager:
 
     def _login(self) -> bool:
         """Authenticate with the API and get a session key."""
+        with self._lock:
+            return self._login_locked()
+
+    def _login_locked(self) -> bool:
         if self._session_key:
             return True
 
@@ -100,12 +233,20 @@ class SSHKeyManager:
         if not base_url:
             return False
 
+        cache = self._get_session_cache()
+        if cache:
+            state = cache.load()
+            if state.get("session_key") and cache.is_valid(state, "session_expires"):
+                logger.debug("Using cached session")
+                SSHKeyManager._session_key = state["session_key"]
+                return True
+
         credentials = self._get_credentials()
         login_endpoint = f"{base_url}/login/"
         headers = {"Content-Type": "application/json", "Accept": "application/json"}
 
         try:
-            response = requests.post(
+            response = get_session().post(
                 login_endpoint,
                 json=credentials,
                 headers=headers,
@@ -116,10 +257,17 @@ class SSHKeyManager:
                 logger.error(
                     "Login failed: %s - %s", response.status_code, response.text
                 )
+                if response.status_code in (400, 401, 403):
+                    SSHKeyManager._credentials = None  # Ask again next time
                 return False
 
             response_data = response.json()
-            self._session_key = response_data.get("session_key")
+            SSHKeyManager._session_key = response_data.get("session_key")
+            if self._session_key and cache:
+                cache.update(
+                    session_key=self._session_key,
+                    session_expires=time.time() + cache.session_ttl,
+                )
             return bool(self._session_key)
 
         except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
@@ -127,10 +275,47 @@ class SSHKeyManager:
             return False
 
     def fetch_ssh_keys(self, force_refresh: bool = False) -> Optional[List[str]]:
-        """Fetch SSH keys from the API server."""
+        """
+        Fetch SSH keys from the API server. A key list cached on disk is reused
+        until it expires, then revalidated with ETag/Last-Modified.
+
+        Safe to call from many hosts at once: only one caller fetches, and
+        callers that were waiting on it share its result, keys or failure. A
+        failure is reused for ``FAILURE_TTL`` seconds unless ``force_refresh``.
+        """
         if self._ssh_keys and not force_refresh:
             return self._ssh_keys
 
+        generation = self._fetch_generation
+        with self._lock:
+            if self._fetch_generation != generation:
+                # Another caller fetched while we waited for the lock
+                return self._ssh_keys
+            if self._ssh_keys and not force_refresh:
+                return self._ssh_keys
+            if not force_refresh and time.monotonic() < self._failed_until:
+                logger.debug("Reusing recent SSH key fetch failure")
+                return None
+
+            keys = self._fetch_ssh_keys_locked(force_refresh)
+            SSHKeyManager._fetch_generation += 1
+            SSHKeyManager._failed_until = (
+                0.0 if keys else time.monotonic() + self.FAILURE_TTL
+            )
+            return keys
+
+    def _fetch_ssh_keys_locked(self, force_refresh: bool) -> Optional[List[str]]:
+        cache = self._get_session_cache()
+        state = cache.load() if cache else {}
+        if (
+            state.get("keys")
+            and not force_refresh
+            and cache.is_valid(state, "keys_expires")
+        ):
+            logger.debug("Using cached SSH key list")
+            SSHKeyManager._ssh_keys = state["keys"]
+            return self._ssh_keys
+
         if not self._login():
             return None
 
@@ -138,46 +323,198 @@ class SSHKeyManager:
         if not base_url:
             return None
 
-        response = self._make_auth_request(f"{base_url}/ssh-tools/ssh-keylist/")
-        if not response:
+        headers = {}
+        if state.get("keys"):
+            if state.get("keys_etag"):
+                headers["If-None-Match"] = state["keys_etag"]
+            if state.get("keys_last_modified"):
+                headers["If-Modified-Since"] = state["keys_last_modified"]
+
+        endpoint = f"{base_url}/ssh-tools/ssh-keylist/"
+        response = self._make_auth_request(
+            endpoint, headers=headers, accept=(200, 304, 401, 403)
+        )
+        if response is not None and response.status_code in (401, 403):
+            # The cached session expired on the server; log in once more
+            logger.debug("Session rejected, logging in again")
+            SSHKeyManager._session_key = None
+            if cache:
+                cache.update(session_key=None, session_expires=0)
+            if not self._login():
+                return None
+            response = self._make_auth_request(
+                endpoint, headers=headers, accept=(200, 304)
+            )
+        if response is None or response.status_code not in (200, 304):
             return None
 
+        if response.status_code == 304:
+            SSHKeyManager._ssh_keys = state["keys"]
+            if cache:
+                cache.update(keys_expires=time.time() + cache.keys_ttl)
+            return self._ssh_keys
+
         try:
             ssh_data = response.json()
-            self._ssh_keys = [key_data["key"] for key_data in ssh_data["result"]]
-            return self._ssh_keys
+            SSHKeyManager._ssh_keys = [
+                key_data["key"] for key_data in ssh_data["result"]
+            ]
         except (KeyError, json.JSONDecodeError) as e:
             logger.error("Failed to parse SSH keys response: %s", str(e))
             return None
 
+        if cache:
+            cache.update(
+                keys=self._ssh_keys,
+                keys_etag=response.headers.get("ETag"),
+                keys_last_modified=response.headers.get("Last-Modified"),
+                keys_expires=time.time() + cache.keys_ttl,
+            )
+        return self._ssh_keys
+
+    @staticmethod
+    def keys_digest(keys: List[str]) -> str:
+        """Digest of a key set, independent of order, duplicates and spacing."""
+        normalized = sorted({normalize_key(key) for key in keys if key.strip()})
+        return hashlib.sha256("\n".join(normalized).encode()).hexdigest()
+
     @deploy("Add SSH keys to authorized_keys")
-    def add_ssh_keys(self, force_refresh: bool = False) -> bool:
-        """Add SSH keys to the authorized_keys file."""
+    def add_ssh_keys(
+        self, force_refresh: bool = False, skip_unchanged: bool = True
+    ) -> bool:
+        """
+        Add SSH keys to the authorized_keys file.
+
+        After deploying, the digest of the key set and of the resulting file
+        are recorded in a marker next to authorized_keys. With
+        ``skip_unchanged``, hosts whose marker matches both are skipped after a
+        single fact, without any further operations.
+        """
         keys = self.fetch_ssh_keys(force_refresh)
         if not keys:
             logger.error("No SSH keys available to deploy")
             return False
 
         try:
-            current_user = host.get_fact(User)
-            user_details = host.get_fact(Users)[current_user]
+            state = host.get_fact(AuthorizedKeysState)
+            current_user = state["user"]
+            digest = self.keys_digest(keys)
+
+            if (
+                skip_unchanged
+                and state["file_digest"]
+                and state["marker_keys_digest"] == digest
+                and state["marker_file_digest"] == state["file_digest"]
+            ):
+                logger.debug("SSH keys for %s are up to date", current_user)
+                return True
 
             server.user_authorized_keys(
                 name=f"Add SSH keys for {current_user}",
                 user=current_user,
-                group=user_details["group"],
+                group=state["group"],
                 public_keys=keys,
                 delete_keys=False,
             )
+
+            owner = shlex.quote(f"{current_user}:{state['group']}")
+            # Keys dropped from the list stay in authorized_keys (nothing is
+            # deleted here), so they stay managed for distribute_ssh_keys to
+            # revoke later
+            managed = sorted(
+                {normalize_key(key) for key in keys + state["managed"] if key.strip()}
+            )
+            server.shell(
+                name=f"Record deployed SSH key set for {current_user}",
+                commands=[
+                    _marker_script(f"{state['home']}/.ssh", owner, digest, managed)
+                ],
+            )
             return True
 
         except Exception as e:
             logger.error("Error setting up SSH keys: %s", str(e))
             return False
 
+    @deploy("Deploy authorized_keys for several users")
+    def deploy_authorized_keys(
+        self, user_keys: Dict[str, List[str]], exclusive: bool = False
+    ) -> Dict[str, str]:
+        """
+        Make each user's authorized_keys hold exactly the wanted keys: missing
+        keys are added and revoked ones removed. A key is revoked when
+        infraninja deployed it before and it is no longer wanted, or, with
+        ``exclusive``, whenever it is not wanted.
+
+        All users' files are read by one fact and each user that needs changes
+        gets one atomic write. Returns ``{user: "unchanged" | "updated" |
+        "missing"}``.
+        """
+        users_state = host.get_fact(AuthorizedKeys, users=sorted(user_keys))
+        status: Dict[str, str] = {}
+
+        for user, keys in sorted(user_keys.items()):
+            current = users_state.get(user)
+            if current is None:
+                logger.warning("User %s does not exist, skipping its SSH keys", user)
+                status[user] = "missing"
+                continue
+
+            digest = self.keys_digest(keys)
+            managed = sorted({normalize_key(key) for key in keys if key.strip()})
+            lines, added, removed = plan_authorized_keys(
+                current["lines"], current["managed"], keys, exclusive=exclusive
+            )
+            if (
+                not added
+                and not removed
+                and current["marker_keys_digest"] == digest
+                and sorted(current["managed"]) == managed
+            ):
+                status[user] = "unchanged"
+                continue
+
+            ssh_dir = f"{current['home']}/.ssh"
+            owner = shlex.quote(f"{user}:{current['group']}")
+            server.shell(
+                name=(
+                    f"Update authorized_keys for {user} (+{len(added)} -{len(removed)})"
+                ),
+                commands=[
+                    _authorized_keys_script(ssh_dir, owner, lines)
+                    + "\n"
+                    + _marker_script(ssh_dir, owner, digest, managed)
+                ],
+            )
+            status[user] = "updated"
+
+        return status
+
+    def distribute_ssh_keys(
+        self,
+        users: Optional[List[str]] = None,
+        exclusive: bool = False,
+        force_refresh: bool = False,
+    ) -> Dict[str, str]:
+        """
+        Deploy the Jinn key list to several users in one pass, revoking keys
+        dropped from the list. Users default to the ``ssh_key_users`` host data,
+        then to the connecting user.
+        """
+        keys = self.fetch_ssh_keys(force_refresh)
+        if not keys:
+            # Never treat a failed fetch as an empty list: that would revoke all
+            logger.error("No SSH keys available to deploy")
+            return {}
+
+        users = users or host.data.get("ssh_key_users") or [host.get_fact(User)]
+        return self.deploy_authorized_keys(
+            {user: keys for user in users}, exclusive=exclusive
+        )
+
     def clear_cache(self) -> bool:
         """
-        Clear all cached credentials and keys.
+        Clear all cached credentials and keys, including the on-disk cache.
 
         Returns:
             bool: True if cache was cleared successfully.
@@ -186,6 +523,10 @@ class SSHKeyManager:
             SSHKeyManager._credentials = None
             SSHKeyManager._ssh_keys = None
             SSHKeyManager._session_key = None
+            SSHKeyManager._failed_until = 0.0
+            cache = self._get_session_cache()
+            if cache:
+                cache.clear()
             logger.debug("Cache cleared")
             return True
 
@@ -200,3 +541,16 @@ def add_ssh_keys() -> bool:
     """
     manager: SSHKeyManager = SSHKeyManager.get_instance()
     return manager.add_ssh_keys()
+
+
+def distribute_ssh_keys(
+    users: Optional[List[str]] = None, exclusive: bool = False
+) -> Dict[str, str]:
+    """
+    Deploy the Jinn key list to several users with the singleton instance.
+
+    Returns:
+        Dict[str, str]: Per-user status, ``unchanged``, ``updated`` or ``missing``.
+    """
+    manager: SSHKeyManager = SSHKeyManager.get_instance()
+    return manager.distribute_ssh_keys(users, exclusive=exclusive)
@@ -0,0 +1,175 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import secrets
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from infraninja.inventory.config import NinjaConfig
+from infraninja.inventory.files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+KEYRING_SERVICE = "infraninja"
+KEYRING_USERNAME = "session-cache"
+PBKDF2_ITERATIONS = 200_000
+
+
+class SessionCache:
+    """
+    On-disk cache of the Jinn login session and SSH key list, shared between
+    processes so short-lived runs don't log in (and prompt) every time.
+
+    One file per API URL and user (``username``, when known before logging
+    in), created 0600 in a 0700 directory. With a passphrase or the system
+    keyring the contents are encrypted with Fernet (needs the ``cryptography``
+    package; without it nothing is cached rather than writing the session in
+    clear). The key is derived once per salt and reused. Entries carry their
+    own expiry times.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        base_url: str,
+        session_ttl: int = 12 * 3600,
+        keys_ttl: int = 300,
+        passphrase: Optional[str] = None,
+        use_keyring: bool = False,
+        username: Optional[str] = None,
+    ) -> None:
+        scope = hashlib.sha256(
+            f"{base_url.rstrip('/')}\0{username or ''}".encode()
+        ).hexdigest()
+        self.cache_dir = Path(cache_dir) / "sessions"
+        self.path = self.cache_dir / f"{scope[:16]}.json"
+        self.session_ttl = session_ttl
+        self.keys_ttl = keys_ttl
+        self.passphrase = passphrase
+        self.use_keyring = use_keyring
+        self._salt: Optional[bytes] = None
+        self._fernets: Dict[bytes, Any] = {}  # salt -> Fernet, PBKDF2 is slow
+
+    @classmethod
+    def from_config(
+        cls, config: NinjaConfig, base_url: str, username: Optional[str] = None
+    ) -> "SessionCache":
+        return cls(
+            config.cache_dir,
+            base_url,
+            session_ttl=config.session_ttl,
+            keys_ttl=config.keys_ttl,
+            passphrase=config.cache_passphrase,
+            use_keyring=config.cache_keyring,
+            username=username,
+        )
+
+    @property
+    def encrypted(self) -> bool:
+        return bool(self.passphrase or self.use_keyring)
+
+    def _secret(self) -> Optional[str]:
+        if self.passphrase:
+            return self.passphrase
+        try:
+            import keyring
+        except ImportError:
+            logger.warning("keyring is not installed; not caching the Jinn session")
+            return None
+        try:
+            secret = keyring.get_password(KEYRING_SERVICE, KEYRING_USERNAME)
+            if secret is None:
+                secret = secrets.token_urlsafe(32)
+                keyring.set_password(KEYRING_SERVICE, KEYRING_USERNAME, secret)
+            return secret
+        except Exception as e:  # keyring raises backend-specific errors
+            logger.warning("Keyring unavailable, not caching the Jinn session: %s", e)
+            return None
+
+    def _fernet(self, salt: bytes) -> Optional[Any]:
+        if salt in self._fernets:
+            return self._fernets[salt]
+        try:
+            from cryptography.fernet import Fernet
+        except ImportError:
+            logger.warning(
+                "cryptography is not installed; not caching the Jinn session"
+            )
+            return None
+        secret = self._secret()
+        if secret is None:
+            return None
+        key = hashlib.pbkdf2_hmac(
+            "sha256", secret.encode(), salt, PBKDF2_ITERATIONS, dklen=32
+        )
+        fernet = self._fernets[salt] = Fernet(base64.urlsafe_b64encode(key))
+        return fernet
+
+    def load(self) -> Dict[str, Any]:
+        """Return the cached state, empty if missing, unreadable or undecryptable."""
+        try:
+            with open(self.path, "r") as file:
+                stored = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.debug("Ignoring unreadable session cache %s: %s", self.path, e)
+            return {}
+
+        if "token" not in stored:
+            # Never trust a plaintext file when encryption is configured
+            return {} if self.encrypted else stored.get("data", {})
+        if not self.encrypted:
+            return {}
+        salt = base64.b64decode(stored.get("salt", ""))
+        fernet = self._fernet(salt)
+        if fernet is None:
+            return {}
+        try:
+            data = json.loads(fernet.decrypt(stored["token"].encode()))
+        except Exception as e:  # InvalidToken, or a corrupt payload
+            logger.debug("Cannot decrypt session cache %s: %s", self.path, e)
+            return {}
+        self._salt = salt  # Saves keep it, reusing the derived key
+        return data
+
+    def save(self, data: Dict[str, Any]) -> None:
+        """Atomically replace the cached state, readable only by the owner."""
+        if self.encrypted:
+            salt = self._salt = self._salt or os.urandom(16)
+            fernet = self._fernet(salt)
+            if fernet is None:
+                return
+            stored = {
+                "salt": base64.b64encode(salt).decode(),
+                "token": fernet.encrypt(json.dumps(data).encode()).decode(),
+            }
+        else:
+            stored = {"data": data}
+
+        try:
+            with atomic_write(self.path) as file:
+                json.dump(stored, file)
+        except OSError as e:
+            logger.warning("Could not write session cache %s: %s", self.path, e)
+
+    def update(self, **values: Any) -> Dict[str, Any]:
+        """Merge values into the cached state and save it."""
+        data = self.load()
+        data.update(values)
+        self.save(data)
+        return data
+
+    def clear(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def is_valid(data: Dict[str, Any], expires_key: str) -> bool:
+        """Whether the entry whose expiry is stored under ``expires_key`` is live."""
+        return time.time() < (data.get(expires_key) or 0)
@@ -0,0 +1,54 @@
+import posixpath
+import shlex
+from typing import List, Optional
+
+_HEREDOC = "INFRANINJA_EOF"
+
+
+def heredoc(lines: List[str]) -> str:
+    """A quoted here-document holding ``lines``, nothing in them is expanded."""
+    content = "\n".join(lines)
+    return f"<<'{_HEREDOC}'\n{content}\n{_HEREDOC}"
+
+
+def atomic_write_script(
+    path: str,
+    lines: List[str],
+    mode: Optional[str] = None,
+    owner: Optional[str] = None,
+    validate: Optional[str] = None,
+    post: Optional[str] = None,
+) -> str:
+    """
+    Shell commands replacing ``path`` with ``lines`` atomically: the content
+    goes to a temporary file next to it, which is renamed over ``path``.
+
+    ``mode`` defaults to the mode of the existing file, else 600. ``validate``
+    runs before the rename with the temporary file in ``$t``; if it fails the
+    file is left untouched and the script exits non-zero. ``post`` runs once
+    the file is in place.
+    """
+    directory = shlex.quote(posixpath.dirname(path))
+    name = posixpath.basename(path)
+    quoted_path = shlex.quote(path)
+    commands = [
+        "set -e",
+        f"mkdir -p {directory}",
+        f"t=$(mktemp {directory}/.{name}.XXXXXX)",
+        f'cat > "$t" {heredoc(lines)}',
+    ]
+    if mode:
+        commands.append(f'chmod {mode} "$t"')
+    else:
+        commands.append(
+            f'if [ -f {quoted_path} ]; then chmod "$(stat -c %a {quoted_path})" "$t"; '
+            'else chmod 600 "$t"; fi'
+        )
+    if owner:
+        commands.append(f'chown {owner} "$t"')
+    if validate:
+        commands.append(f'if ! {validate}; then rm -f "$t"; exit 1; fi')
+    commands.append(f'mv -f "$t" {quoted_path}')
+    if post:
+        commands.append(post)
+    return "\n".join(commands)